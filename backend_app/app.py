@@ -1,54 +1,2035 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, has_request_context, request, jsonify, send_file, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import jwt
+import base64
+import click
+import concurrent.futures
+import csv
 import datetime
+import decimal
+import hashlib
+import io
+import json
+import math
+import multiprocessing
+import os
+import queue
+import re
+import select
+import sys
+import tempfile
+import threading
+import time
+import timeit
+import uuid
+import zipfile
+import zlib
+from collections import OrderedDict
+from xml.sax.saxutils import escape as xml_escape
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.middleware.proxy_fix import ProxyFix
+from werkzeug.sansio.multipart import Data, Epilogue, File, MultipartDecoder, NeedData
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+try:
+    import redis
+except ImportError:  # only needed for a shared rate limit backend
+    redis = None
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # document previews are optional
+    Image = None
+
+try:
+    import pypdfium2
+except ImportError:  # PDF previews are optional
+    pypdfium2 = None
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; falls back to the stdlib encoder
+    orjson = None
+
+
+def json_default(obj):
+    """Encode the non-JSON types psycopg2 rows carry: Decimal as a string, dates as ISO 8601."""
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson when installed, producing the same documents either way."""
+
+    def _orjson_options(self):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.dumps(obj, default=json_default, option=self._orjson_options()).decode()
+        kwargs.setdefault("default", json_default)
+        kwargs.setdefault("ensure_ascii", self.ensure_ascii)
+        kwargs.setdefault("sort_keys", self.sort_keys)
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        # Hand orjson's bytes straight to the response instead of round-tripping through str.
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=json_default, option=self._orjson_options())
+        return self._app.response_class(body, mimetype=self.mimetype)
+
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app, resources={r"/*": {"origins": "*"}})
 
-app.config["SECRET_KEY"] = "supersecretkey123"
+app.config["SECRET_KEY"] = "supersecretkey123"
+# Off until every client sends "Authorization: Bearer <token>"; a bad token is rejected either way
+app.config["AUTH_REQUIRED"] = os.environ.get("AUTH_REQUIRED", "false").lower() == "true"
+app.config["AUTH_CACHE_SIZE"] = int(os.environ.get("AUTH_CACHE_SIZE", 10000))
+app.config["DATABASE"] = {
+    "host": os.environ.get("DB_HOST", "localhost"),
+    "port": int(os.environ.get("DB_PORT", 5432)),
+    "database": os.environ.get("DB_NAME", "usersdb"),
+    "user": os.environ.get("DB_USER", "postgres"),
+    "password": os.environ.get("DB_PASSWORD", ""),
+}
+app.config["DB_POOL_MAX"] = int(os.environ.get("DB_POOL_MAX", 10))
+app.config["DB_POOL_TIMEOUT"] = float(os.environ.get("DB_POOL_TIMEOUT", 5))
+app.config["DB_POOL_HEALTH_CHECK_AFTER"] = float(os.environ.get("DB_POOL_HEALTH_CHECK_AFTER", 30))
+# Read replicas as "host[:port],..."; they share the primary's database name and credentials
+app.config["DB_REPLICA_HOSTS"] = [h for h in os.environ.get("DB_REPLICA_HOSTS", "").split(",") if h]
+app.config["DB_REPLICA_MAX_LAG"] = float(os.environ.get("DB_REPLICA_MAX_LAG", 5))
+app.config["DB_REPLICA_LAG_CHECK_INTERVAL"] = float(os.environ.get("DB_REPLICA_LAG_CHECK_INTERVAL", 2))
+app.config["READ_YOUR_WRITES_WINDOW"] = float(os.environ.get("READ_YOUR_WRITES_WINDOW", 10))
+# Turn off behind a transaction-mode PgBouncer, where session-level PREPARE is not safe
+app.config["DB_PREPARED_STATEMENTS"] = os.environ.get("DB_PREPARED_STATEMENTS", "true").lower() == "true"
+# Fallback expiry for cached values whose tables are also written outside this API (e.g. Supabase clients)
+app.config["DASHBOARD_CACHE_TTL"] = float(os.environ.get("DASHBOARD_CACHE_TTL", 30))
+# renewal_settings is pushed via LISTEN/NOTIFY; the short TTL only applies while the listener is down
+app.config["RENEWAL_STATUS_TTL"] = float(os.environ.get("RENEWAL_STATUS_TTL", 3600))
+app.config["RENEWAL_STATUS_FALLBACK_TTL"] = float(os.environ.get("RENEWAL_STATUS_FALLBACK_TTL", 5))
+app.config["COMPRESS_MIN_SIZE"] = 1024
+app.config["COMPRESS_LEVEL"] = 6
+app.config["COMPRESS_CACHE_BYTES"] = 32 * 1024 * 1024
+app.config["EVENTS_HEARTBEAT"] = 15
+app.config["EVENTS_QUEUE_SIZE"] = 256
+app.config["PAGE_SIZE_DEFAULT"] = 50
+app.config["PAGE_SIZE_MAX"] = 200
+app.config["STREAM_BATCH_SIZE"] = 1000
+app.config["BULK_STATUS_MAX"] = 1000
+app.config["IMPORT_REJECTED_ROWS_MAX"] = 1000
+# Token buckets per signed-in user and route as (requests per minute, burst); routes not listed use
+# the default. Anonymous callers are only held back by WRITE_CONCURRENCY_MAX, since behind NAT or a
+# proxy one address stands for many students.
+app.config["RATE_LIMIT_DEFAULT"] = (60, 20)
+app.config["RATE_LIMITS"] = {"apply_scholarship": (6, 3), "renew_scholarship": (6, 3)}
+# Share buckets between workers through Redis, e.g. redis://localhost:6379/0; empty keeps them in-process
+app.config["RATE_LIMIT_REDIS_URL"] = os.environ.get("RATE_LIMIT_REDIS_URL", "")
+# Group-commit apply/renew inserts: one multi-row INSERT and one commit per batch
+app.config["WRITE_BATCHING"] = os.environ.get("WRITE_BATCHING", "false").lower() == "true"
+app.config["WRITE_BATCH_MAX_ROWS"] = int(os.environ.get("WRITE_BATCH_MAX_ROWS", 100))
+app.config["WRITE_BATCH_MAX_DELAY"] = float(os.environ.get("WRITE_BATCH_MAX_DELAY", 0.005))
+app.config["WRITE_BATCH_TIMEOUT"] = float(os.environ.get("WRITE_BATCH_TIMEOUT", 30))
+# Leave a couple of pooled connections for reads while writes are saturated. Batched writes share
+# one connection, so with batching on the cap only needs to let a full batch through.
+app.config["WRITE_CONCURRENCY_MAX"] = int(os.environ.get(
+    "WRITE_CONCURRENCY_MAX",
+    app.config["WRITE_BATCH_MAX_ROWS"] if app.config["WRITE_BATCHING"] else max(app.config["DB_POOL_MAX"] - 2, 1)
+))
+app.config["WRITE_ADMISSION_WAIT"] = float(os.environ.get("WRITE_ADMISSION_WAIT", 0.25))
+# Number of reverse proxies (e.g. nginx) in front of the app whose X-Forwarded-For/-Proto to trust.
+# Leave at 0 when clients connect directly, or they could spoof their address.
+app.config["TRUSTED_PROXIES"] = int(os.environ.get("TRUSTED_PROXIES", 0))
+if app.config["TRUSTED_PROXIES"]:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config["TRUSTED_PROXIES"],
+                            x_proto=app.config["TRUSTED_PROXIES"])
+app.config["DOCUMENT_STORE_DIR"] = os.environ.get("DOCUMENT_STORE_DIR", os.path.join(app.root_path, "documents"))
+app.config["DOCUMENT_MAX_BYTES"] = int(os.environ.get("DOCUMENT_MAX_BYTES", 10 * 1024 * 1024))
+app.config["DOCUMENT_CHUNK_SIZE"] = 64 * 1024
+# Stored names never change content, so clients may keep them for a year
+app.config["DOCUMENT_CACHE_MAX_AGE"] = 365 * 24 * 3600
+# Longest side in pixels of each JPEG derivative made for uploaded documents
+app.config["PREVIEW_VARIANTS"] = {"thumbnail": 256, "preview": 1024}
+app.config["PREVIEW_WORKERS"] = int(os.environ.get("PREVIEW_WORKERS", min(4, os.cpu_count() or 1)))
+app.config["PREVIEW_TIMEOUT"] = float(os.environ.get("PREVIEW_TIMEOUT", 10))
+# Set to an nginx internal location (e.g. "/protected-documents/") aliased to DOCUMENT_STORE_DIR
+# to have nginx send the file; empty serves it from here with sendfile where the server supports it
+app.config["DOCUMENT_ACCEL_REDIRECT"] = os.environ.get("DOCUMENT_ACCEL_REDIRECT", "")
+
+
+# -----------------------------
+# Database Connection Pool
+# -----------------------------
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection frees up within the timeout."""
+
+
+class PreparedConnection(psycopg2.extensions.connection):
+    """psycopg2 connection that remembers which named statements it has PREPAREd."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+
+
+class PooledConnection:
+    """Proxy around a psycopg2 connection that goes back to the pool on close."""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._conn is not None:
+            self._pool.release(self._conn)
+            self._conn = None
+
+    def detach(self):
+        """Hand the connection to a new owner so leaving this ``with`` block won't release it."""
+        other = PooledConnection(self._pool, self._conn)
+        self._conn = None
+        return other
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and self._conn is not None and not self._conn.closed:
+            self._conn.rollback()
+        self.close()
+        return False
+
+
+class ConnectionPool:
+    """Thread-safe bounded pool of psycopg2 connections."""
+
+    def __init__(self, dsn, maxconn=10, timeout=5.0, health_check_after=30.0):
+        self.dsn = dsn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.health_check_after = health_check_after
+        self.pid = os.getpid()
+        self._idle = []  # (conn, last_used) pairs, most recently used last
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self._stats = {"created": 0, "discarded": 0, "checkouts": 0, "waits": 0, "timeouts": 0, "wait_time": 0.0}
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+        with self._cond:
+            self._stats["discarded"] += 1
+
+    def _is_healthy(self, conn, last_used):
+        if conn.closed:
+            return False
+        if time.monotonic() - last_used < self.health_check_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def acquire(self):
+        """Check out a connection, waiting up to ``timeout`` seconds if the pool is full."""
+        wait_started = None
+        try:
+            while True:
+                with self._cond:
+                    while not self._idle and self._in_use >= self.maxconn:
+                        if wait_started is None:
+                            wait_started = time.monotonic()
+                            self._stats["waits"] += 1
+                        remaining = wait_started + self.timeout - time.monotonic()
+                        if remaining <= 0:
+                            self._stats["timeouts"] += 1
+                            raise PoolTimeout(f"No database connection available within {self.timeout}s")
+                        self._cond.wait(remaining)
+                    # Reserve the slot before checking or connecting so other threads can't overshoot maxconn.
+                    self._in_use += 1
+                    idle = self._idle.pop() if self._idle else None
+                if idle is None:
+                    break
+
+                # The health check can block on a dead socket, so it runs without holding the pool lock.
+                conn, last_used = idle
+                if self._is_healthy(conn, last_used):
+                    with self._cond:
+                        self._stats["checkouts"] += 1
+                    return PooledConnection(self, conn)
+                self._discard(conn)
+                with self._cond:
+                    self._in_use -= 1
+                    self._cond.notify()
+        finally:
+            if wait_started is not None:
+                with self._cond:
+                    self._stats["wait_time"] += time.monotonic() - wait_started
+
+        try:
+            conn = psycopg2.connect(connection_factory=PreparedConnection, **self.dsn)
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats["created"] += 1
+            self._stats["checkouts"] += 1
+        return PooledConnection(self, conn)
+
+    def release(self, conn):
+        """Return a connection, rolling back any transaction left open by the caller."""
+        if not conn.closed and conn.status != psycopg2.extensions.STATUS_READY:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                conn.close()
+        with self._cond:
+            self._in_use -= 1
+            if conn.closed or len(self._idle) >= self.maxconn:
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "max_size": self.maxconn,
+                "created": self._stats["created"],
+                "discarded": self._stats["discarded"],
+                "checkouts": self._stats["checkouts"],
+                "waits": self._stats["waits"],
+                "timeouts": self._stats["timeouts"],
+                "wait_time_ms": round(self._stats["wait_time"] * 1000, 3),
+            }
+
+
+_db_pool = None
+_db_pool_lock = threading.Lock()
+
+
+def get_db_pool():
+    """Return this process's pool, rebuilding it after a fork so workers never share sockets."""
+    global _db_pool
+    pool = _db_pool
+    if pool is not None and pool.pid == os.getpid():
+        return pool
+    with _db_pool_lock:
+        if _db_pool is None or _db_pool.pid != os.getpid():
+            _db_pool = ConnectionPool(
+                app.config["DATABASE"],
+                maxconn=app.config["DB_POOL_MAX"],
+                timeout=app.config["DB_POOL_TIMEOUT"],
+                health_check_after=app.config["DB_POOL_HEALTH_CHECK_AFTER"],
+            )
+        return _db_pool
+
+
+# -----------------------------
+# Read Replica Routing
+# -----------------------------
+
+class ReplicaRouter:
+    """Round-robins reads over replica pools whose replication lag is within bounds."""
+
+    def __init__(self, primary_dsn, hosts, max_lag=5.0, lag_check_interval=2.0):
+        self.pid = os.getpid()
+        self.max_lag = max_lag
+        self.lag_check_interval = lag_check_interval
+        self.replicas = []
+        for host in hosts:
+            name, _, port = host.strip().partition(":")
+            dsn = dict(primary_dsn, host=name, port=int(port) if port else primary_dsn["port"])
+            pool = ConnectionPool(
+                dsn,
+                maxconn=app.config["DB_POOL_MAX"],
+                timeout=app.config["DB_POOL_TIMEOUT"],
+                health_check_after=app.config["DB_POOL_HEALTH_CHECK_AFTER"],
+            )
+            self.replicas.append({"host": host.strip(), "pool": pool, "lag": None, "checked_at": 0.0})
+        self._next = 0
+        self._lock = threading.Lock()
+        self.primary_fallbacks = 0
+
+    def _lag(self, replica):
+        """Seconds behind the primary (cached), or None if the replica can't be reached."""
+        now = time.monotonic()
+        if now - replica["checked_at"] < self.lag_check_interval:
+            return replica["lag"]
+        replica["checked_at"] = now
+        try:
+            with replica["pool"].acquire() as conn:
+                cur = conn.cursor()
+                # An idle replica has replayed everything it received; otherwise measure replay delay.
+                cur.execute(
+                    """SELECT CASE
+                           WHEN NOT pg_is_in_recovery() THEN 0
+                           WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                           ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+                       END"""
+                )
+                replica["lag"] = float(cur.fetchone()[0])
+                cur.close()
+        except Exception:
+            app.logger.exception("Replica %s is unavailable", replica["host"])
+            replica["lag"] = None
+        return replica["lag"]
+
+    def pick(self):
+        """Return a replica pool within the lag threshold, or None to use the primary."""
+        with self._lock:
+            start = self._next
+            self._next = (self._next + 1) % len(self.replicas)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            lag = self._lag(replica)
+            if lag is not None and lag <= self.max_lag:
+                return replica["pool"]
+        self.primary_fallbacks += 1
+        return None
+
+    def stats(self):
+        return {
+            "primary_fallbacks": self.primary_fallbacks,
+            "replicas": [
+                {"host": r["host"], "lag_seconds": r["lag"], "pool": r["pool"].stats()} for r in self.replicas
+            ],
+        }
+
+
+_replica_router = None
+
+
+def get_replica_router():
+    """Return this process's replica router, or None when no replicas are configured."""
+    global _replica_router
+    if not app.config["DB_REPLICA_HOSTS"]:
+        return None
+    router = _replica_router
+    if router is not None and router.pid == os.getpid():
+        return router
+    with _db_pool_lock:
+        if _replica_router is None or _replica_router.pid != os.getpid():
+            _replica_router = ReplicaRouter(
+                app.config["DATABASE"],
+                app.config["DB_REPLICA_HOSTS"],
+                max_lag=app.config["DB_REPLICA_MAX_LAG"],
+                lag_check_interval=app.config["DB_REPLICA_LAG_CHECK_INTERVAL"],
+            )
+        return _replica_router
+
+
+PRIMARY_COOKIE = "db_primary_until"
+_recent_writers = {}  # client key -> monotonic deadline for read-your-writes
+
+
+def client_key():
+    """Identify the caller for read-your-writes stickiness without keeping raw tokens around.
+
+    Anonymous callers fall back to their address, which is only the real
+    client's when TRUSTED_PROXIES matches the proxies in front of the app.
+    """
+    identity = request.headers.get("Authorization") or request.remote_addr or ""
+    return hashlib.sha256(identity.encode()).hexdigest()
+
+
+def reads_need_primary():
+    """True if the current caller wrote recently and a replica might not show it yet."""
+    if not has_request_context():
+        return False
+    try:
+        if float(request.cookies.get(PRIMARY_COOKIE, 0)) > time.time():
+            return True
+    except ValueError:
+        pass
+    deadline = _recent_writers.get(client_key())
+    return deadline is not None and deadline > time.monotonic()
+
+
+@app.after_request
+def remember_recent_writes(response):
+    """Pin the writer's reads to the primary for READ_YOUR_WRITES_WINDOW seconds."""
+    if (app.config["DB_REPLICA_HOSTS"] and request.method in ("POST", "PUT", "PATCH", "DELETE")
+            and response.status_code < 400):
+        window = app.config["READ_YOUR_WRITES_WINDOW"]
+        now = time.monotonic()
+        if len(_recent_writers) > 10000:
+            for key, deadline in list(_recent_writers.items()):
+                if deadline <= now:
+                    _recent_writers.pop(key, None)
+        _recent_writers[client_key()] = now + window
+        response.set_cookie(PRIMARY_COOKIE, str(time.time() + window), max_age=int(window) + 1)
+    return response
+
+
+# Database connection
+def get_db_connection(readonly=False):
+    """Check out a pooled connection; use it as ``with get_db_connection() as conn:``.
+
+    Pass ``readonly=True`` for queries that may be served by a replica.
+    """
+    if readonly:
+        router = get_replica_router()
+        if router is not None and not reads_need_primary():
+            pool = router.pick()
+            if pool is not None:
+                return pool.acquire()
+    return get_db_pool().acquire()
+
+
+# -----------------------------
+# Prepared Statements
+# -----------------------------
+
+class PreparedStatementRegistry:
+    """Named statements that are PREPAREd once per pooled connection and EXECUTEd afterwards.
+
+    Planning time saved is estimated from one EXPLAIN (SUMMARY) sample per
+    statement, taken the first time this process prepares it.
+    """
+
+    def __init__(self):
+        self.statements = {}  # name -> (sql, prepare_sql, param_count)
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def register(self, name, sql):
+        param_count = sql.count("%s")
+        numbered = iter(range(1, param_count + 1))
+        prepare_sql = f"PREPARE {name} AS " + re.sub(r"%s", lambda m: f"${next(numbered)}", sql)
+        self.statements[name] = (sql, prepare_sql, param_count)
+        self._stats[name] = {"prepares": 0, "executions": 0, "planning_ms": None}
+
+    def execute(self, cur, name, params=()):
+        sql, prepare_sql, param_count = self.statements[name]
+        conn = cur.connection
+        # Connections not created by the pool can't track what they've prepared.
+        prepared = getattr(conn, "prepared", None)
+        if prepared is None or not app.config["DB_PREPARED_STATEMENTS"]:
+            cur.execute(sql, params)
+            return
+
+        if name not in prepared:
+            if self._stats[name]["planning_ms"] is None:
+                self._sample_planning_time(conn, name, sql, params)
+            cur.execute(prepare_sql)
+            prepared.add(name)
+            with self._lock:
+                self._stats[name]["prepares"] += 1
+
+        placeholders = ", ".join(["%s"] * param_count)
+        cur.execute(f"EXECUTE {name} ({placeholders})" if param_count else f"EXECUTE {name}", params)
+        with self._lock:
+            self._stats[name]["executions"] += 1
+
+    def _sample_planning_time(self, conn, name, sql, params):
+        with conn.cursor() as plain:
+            plain.execute("EXPLAIN (SUMMARY ON, FORMAT JSON) " + sql, params)
+            planning_ms = plain.fetchone()[0][0].get("Planning Time", 0.0)
+        with self._lock:
+            self._stats[name]["planning_ms"] = planning_ms
+
+    def stats(self):
+        with self._lock:
+            statements = {}
+            total_executions = total_prepares = 0
+            total_saved = 0.0
+            for name, stat in self._stats.items():
+                reused = max(stat["executions"] - stat["prepares"], 0)
+                saved = reused * (stat["planning_ms"] or 0.0)
+                statements[name] = {
+                    "prepares": stat["prepares"],
+                    "executions": stat["executions"],
+                    "hit_rate": round(reused / stat["executions"], 4) if stat["executions"] else None,
+                    "planning_ms_sample": stat["planning_ms"],
+                    "planning_ms_saved": round(saved, 3),
+                }
+                total_executions += stat["executions"]
+                total_prepares += stat["prepares"]
+                total_saved += saved
+            reused = max(total_executions - total_prepares, 0)
+            return {
+                "enabled": app.config["DB_PREPARED_STATEMENTS"],
+                "executions": total_executions,
+                "prepares": total_prepares,
+                "hit_rate": round(reused / total_executions, 4) if total_executions else None,
+                "planning_ms_saved": round(total_saved, 3),
+                "statements": statements,
+            }
+
+
+prepared_statements = PreparedStatementRegistry()
+
+# Columns the API returns and accepts in ?fields=; search_vector stays internal.
+APPLICATION_FIELDS = (
+    "application_id", "user_id", "student_id", "first_name", "middle_name", "last_name",
+    "contact_number", "address", "municipality", "baranggay", "school_name", "course",
+    "year_level", "gwa", "year_applied", "reason", "scholarship_type", "school_id_path",
+    "id_picture_path", "birth_certificate_path", "grades_path", "cor_path", "status",
+    "archived", "submission_date", "updated_at",
+)
+
+RENEWAL_FIELDS = (
+    "renewal_id", "application_id", "user_id", "student_id", "first_name", "middle_name",
+    "last_name", "contact_number", "address", "municipality", "baranggay", "course",
+    "year_level", "gwa", "reason", "school_id_path", "id_picture_path",
+    "birth_certificate_path", "grades_path", "cor_path", "status", "archived",
+    "submission_date",
+)
+
+MAYOR_APPLICATION_FIELDS = (
+    "application_id", "user_id", "first_name", "middle_name", "last_name",
+    "student_id", "course", "year_level", "gwa", "status", "submission_date",
+)
+
+
+STUDENT_APPLICATIONS_SQL = """SELECT application_id, user_id as student_id, 
+    CONCAT(first_name, ' ', last_name) as student_name, 
+    status, submission_date::date as date 
+    FROM application WHERE user_id = %s"""
+
+FIRST_APPLICATION_FOR_USER_SQL = "SELECT application_id FROM application WHERE user_id = %s LIMIT 1"
+
+prepared_statements.register(
+    "status_counts",
+    """SELECT table_name, status, SUM(count)::bigint AS count
+       FROM (SELECT table_name, status, count FROM status_counts
+             UNION ALL
+             SELECT table_name, status, delta FROM status_count_deltas) c
+       GROUP BY table_name, status"""
+)
+prepared_statements.register("student_applications", STUDENT_APPLICATIONS_SQL)
+prepared_statements.register("first_application_for_user", FIRST_APPLICATION_FOR_USER_SQL)
+prepared_statements.register(
+    "user_by_email", "SELECT first_name, middle_name, last_name FROM users WHERE email = %s"
+)
+prepared_statements.register(
+    "insert_application",
+    """INSERT INTO application (user_id, first_name, last_name, year_applied, status) 
+       VALUES (%s, %s, %s, %s, %s) RETURNING application_id"""
+)
+prepared_statements.register(
+    "insert_renewal",
+    """INSERT INTO renew (application_id, user_id, first_name, last_name, status) 
+       VALUES (%s, %s, %s, %s, %s) RETURNING renewal_id"""
+)
+prepared_statements.register(
+    "update_application_status",
+    "UPDATE application SET status = %s WHERE application_id = %s RETURNING " + ", ".join(APPLICATION_FIELDS)
+)
+prepared_statements.register(
+    "archive_application",
+    "UPDATE application SET archived = TRUE WHERE application_id = %s RETURNING " + ", ".join(APPLICATION_FIELDS)
+)
+prepared_statements.register(
+    "archive_renewal",
+    "UPDATE renew SET archived = TRUE WHERE renewal_id = %s RETURNING " + ", ".join(RENEWAL_FIELDS)
+)
+prepared_statements.register("renewal_status", "SELECT is_open FROM renewal_settings WHERE id = 1")
+prepared_statements.register(
+    "table_versions",
+    """SELECT table_name, SUM(version)::bigint
+       FROM (SELECT table_name, version FROM status_counts
+             UNION ALL
+             SELECT table_name, 1 FROM status_count_deltas) v
+       WHERE table_name = ANY(%s) GROUP BY table_name"""
+)
+
+
+# -----------------------------
+# In-process Caches
+# -----------------------------
+
+class CachedValue:
+    """Thread-safe lazily loaded value with a TTL and explicit invalidation."""
+
+    def __init__(self, loader, ttl):
+        self.loader = loader
+        self.ttl = ttl  # seconds, or a callable returning seconds
+        self._lock = threading.Lock()
+        self._value = None
+        self._expires = 0.0
+        self._generation = 0
+
+    def get(self):
+        if time.monotonic() < self._expires:
+            return self._value
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock.
+            if time.monotonic() < self._expires:
+                return self._value
+            generation = self._generation
+            value = self.loader()
+            # Only publish if nobody invalidated while the loader was running.
+            if generation == self._generation:
+                ttl = self.ttl() if callable(self.ttl) else self.ttl
+                self._value = value
+                self._expires = time.monotonic() + ttl
+            return value
+
+    def invalidate(self):
+        self._generation += 1
+        self._expires = 0.0
+
+    def expire_within(self, seconds):
+        """Shorten the current value's lifetime to at most ``seconds`` from now."""
+        self._expires = min(self._expires, time.monotonic() + seconds)
+
+
+def compact_status_counts(conn):
+    """Fold the triggers' status_count_deltas rows into status_counts."""
+    cur = conn.cursor()
+    cur.execute("SELECT compact_status_counts()")
+    cur.close()
+    conn.commit()
+
+
+def load_dashboard_stats():
+    """Read per-status totals from the trigger-maintained status_counts table.
+
+    Compacts the pending deltas first, which keeps the table small for
+    table_etag too; reloads happen at most once per DASHBOARD_CACHE_TTL.
+    """
+    with get_db_connection() as conn:
+        compact_status_counts(conn)
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        prepared_statements.execute(cur, "status_counts")
+        rows = cur.fetchall()
+        cur.close()
+
+    counts = {"application": {}, "renew": {}}
+    for row in rows:
+        counts.setdefault(row['table_name'], {})[row['status']] = row['count']
+    app_stats = counts["application"]
+    renewal_stats = counts["renew"]
+
+    return {
+        "total_new": sum(app_stats.values()),
+        "approved_new": app_stats.get('approved', 0),
+        "pending_new": app_stats.get('pending', 0),
+        "rejected_new": app_stats.get('rejected', 0),
+        "total_renewals": sum(renewal_stats.values()),
+        "approved_renewals": renewal_stats.get('approved', 0),
+        "pending_renewals": renewal_stats.get('pending', 0),
+        "rejected_renewals": renewal_stats.get('rejected', 0),
+    }
+
+
+dashboard_stats_cache = CachedValue(load_dashboard_stats, app.config["DASHBOARD_CACHE_TTL"])
+
+
+# -----------------------------
+# Change Notifications
+# -----------------------------
+
+class NotificationListener:
+    """One LISTEN connection per process that dispatches NOTIFY payloads to handlers.
+
+    Handlers are subscribed at import time; the background thread starts on
+    first use and reconnects with backoff. ``on_connect`` callbacks run after
+    every (re)connect so caches can drop anything missed while disconnected;
+    ``on_disconnect`` callbacks run when a connection is lost, so caches can
+    stop relying on notifications until it is back.
+    """
+
+    def __init__(self, dsn, poll_interval=5.0, max_backoff=30.0):
+        self.dsn = dsn
+        self.poll_interval = poll_interval
+        self.max_backoff = max_backoff
+        self.pid = None
+        self.connected = False
+        self._handlers = {}  # channel -> [handler(payload)]
+        self._on_connect = []
+        self._on_disconnect = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel, handler, on_connect=None, on_disconnect=None):
+        self._handlers.setdefault(channel, []).append(handler)
+        if on_connect:
+            self._on_connect.append(on_connect)
+        if on_disconnect:
+            self._on_disconnect.append(on_disconnect)
+
+    def ensure_started(self):
+        """Start the listener thread in this process if it isn't running (e.g. after fork)."""
+        if self.pid == os.getpid():
+            return
+        with self._lock:
+            if self.pid != os.getpid():
+                self.pid = os.getpid()
+                self.connected = False
+                threading.Thread(target=self._run, name="notification-listener", daemon=True).start()
+
+    def _run(self):
+        backoff = 1.0
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(**self.dsn)
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                cur = conn.cursor()
+                for channel in self._handlers:
+                    cur.execute(f"LISTEN {channel}")
+                self.connected = True
+                backoff = 1.0
+                for callback in self._on_connect:
+                    callback()
+                while True:
+                    if select.select([conn], [], [], self.poll_interval) == ([], [], []):
+                        # Idle; a cheap round trip notices a dead socket.
+                        cur.execute("SELECT 1")
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        for handler in self._handlers.get(notify.channel, []):
+                            try:
+                                handler(notify.payload)
+                            except Exception:
+                                app.logger.exception("Notification handler for %s failed", notify.channel)
+            except Exception:
+                app.logger.exception("Notification listener disconnected; retrying in %.0fs", backoff)
+            finally:
+                was_connected, self.connected = self.connected, False
+                if was_connected:
+                    for callback in self._on_disconnect:
+                        callback()
+                if conn is not None:
+                    conn.close()
+            time.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+
+notification_listener = NotificationListener(app.config["DATABASE"])
+
+RENEWAL_SETTINGS_CHANNEL = "renewal_settings_changed"
+
+
+def load_renewal_status():
+    with get_db_connection() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        prepared_statements.execute(cur, "renewal_status")
+        result = cur.fetchone()
+        cur.close()
+    return result['is_open'] if result else False
+
+
+renewal_status_cache = CachedValue(
+    load_renewal_status,
+    lambda: app.config["RENEWAL_STATUS_TTL"] if notification_listener.connected
+    else app.config["RENEWAL_STATUS_FALLBACK_TTL"]
+)
+notification_listener.subscribe(
+    RENEWAL_SETTINGS_CHANNEL,
+    lambda payload: renewal_status_cache.invalidate(),
+    on_connect=renewal_status_cache.invalidate,
+    # A value cached while notifications worked must not outlive them by RENEWAL_STATUS_TTL.
+    on_disconnect=lambda: renewal_status_cache.expire_within(app.config["RENEWAL_STATUS_FALLBACK_TTL"])
+)
+
+
+class EventBroadcaster:
+    """Fans change events from the shared listener out to in-process SSE subscribers."""
+
+    def __init__(self, queue_size=256):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._next_id = 1
+
+    def subscribe(self):
+        q = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def publish(self, event_type, data):
+        with self._lock:
+            event_id = self._next_id
+            self._next_id += 1
+            subscribers = list(self._subscribers)
+        message = f"id: {event_id}\nevent: {event_type}\ndata: {data}\n\n"
+        for q in subscribers:
+            try:
+                q.put_nowait(message)
+            except queue.Full:
+                # A client that stopped reading is told to reload instead of blocking everyone.
+                self.unsubscribe(q)
+                self._close_overflowed(q)
+
+    @staticmethod
+    def _close_overflowed(q):
+        """Replace a full queue's backlog with the end-of-stream marker without blocking."""
+        while True:
+            try:
+                while True:
+                    q.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                q.put_nowait(None)
+                return
+            except queue.Full:  # a publish that started before the unsubscribe got in first
+                continue
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+
+SCHOLARSHIP_EVENTS_CHANNEL = "scholarship_events"
+event_broadcaster = EventBroadcaster(app.config["EVENTS_QUEUE_SIZE"])
+
+
+def publish_event(cur, event_type, **fields):
+    """Queue a change event; Postgres delivers it to every worker when the transaction commits."""
+    cur.execute(
+        "SELECT pg_notify(%s, %s)",
+        (SCHOLARSHIP_EVENTS_CHANNEL, json.dumps({"type": event_type, **fields}, default=str))
+    )
+
+
+def publish_events(cur, events):
+    """Queue many ``(event_type, fields)`` change events in one round trip."""
+    payloads = [json.dumps({"type": event_type, **fields}, default=str) for event_type, fields in events]
+    cur.execute("SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) AS payload",
+                (SCHOLARSHIP_EVENTS_CHANNEL, payloads))
+
+
+def handle_scholarship_event(payload):
+    dashboard_stats_cache.invalidate()
+    event_type = json.loads(payload).get("type", "message")
+    event_broadcaster.publish(event_type, payload)
+
+
+def handle_listener_connected():
+    # Events may have been missed while the listener was down.
+    dashboard_stats_cache.invalidate()
+    event_broadcaster.publish("resync", "{}")
+
+
+notification_listener.subscribe(
+    SCHOLARSHIP_EVENTS_CHANNEL, handle_scholarship_event, on_connect=handle_listener_connected
+)
+
+
+# -----------------------------
+# Group Commit
+# -----------------------------
+
+class PendingWrite:
+    """One request's row waiting in the group-commit queue."""
+
+    def __init__(self, kind, values):
+        self.kind = kind
+        self.values = values
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+        # Guarded by GroupCommitWriter._lock: the flusher claims a write before committing it,
+        # and a submitter that times out first cancels it so it is never committed.
+        self.claimed = False
+        self.cancelled = False
+
+
+def allocate_ids(cur, table, column, count):
+    """Reserve ``count`` ids from the column's sequence so every row knows its id up front."""
+    cur.execute("SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)",
+                (table, column, count))
+    return [row[0] for row in cur.fetchall()]
+
+
+def insert_application_batch(cur, writes):
+    """values: (user_id, first_name, last_name, year_applied, status)"""
+    ids = allocate_ids(cur, "application", "application_id", len(writes))
+    execute_values(
+        cur,
+        """INSERT INTO application (application_id, user_id, first_name, last_name, year_applied, status) 
+           VALUES %s""",
+        [(app_id,) + tuple(write.values) for app_id, write in zip(ids, writes)],
+        page_size=len(writes)
+    )
+    for app_id, write in zip(ids, writes):
+        write.result = {"application_id": app_id}
+    publish_events(cur, [
+        ("application.created", {"application_id": app_id, "user_id": write.values[0]})
+        for app_id, write in zip(ids, writes)
+    ])
+
+
+def insert_renewal_batch(cur, writes):
+    """values: (user_id, first_name, last_name, status); the parent application is looked up per row."""
+    ids = allocate_ids(cur, "renew", "renewal_id", len(writes))
+    # Same fallback as the unbatched path: application 1 when the user has none.
+    execute_values(
+        cur,
+        """INSERT INTO renew (renewal_id, application_id, user_id, first_name, last_name, status) 
+           SELECT v.renewal_id::integer, 
+                  COALESCE((SELECT a.application_id FROM application a 
+                            WHERE a.user_id = v.user_id::integer LIMIT 1), 1), 
+                  v.user_id::integer, v.first_name, v.last_name, v.status 
+           FROM (VALUES %s) AS v (renewal_id, user_id, first_name, last_name, status) 
+           RETURNING renewal_id, application_id, user_id""",
+        [(renewal_id,) + tuple(write.values) for renewal_id, write in zip(ids, writes)],
+        page_size=len(writes)
+    )
+    inserted = {row[0]: row for row in cur.fetchall()}
+    for renewal_id, write in zip(ids, writes):
+        write.result = {"renewal_id": renewal_id, "application_id": inserted[renewal_id][1]}
+    publish_events(cur, [
+        ("renewal.created", {"renewal_id": row[0], "application_id": row[1], "user_id": row[2]})
+        for row in inserted.values()
+    ])
+
+
+WRITE_BATCH_HANDLERS = {
+    "application": insert_application_batch,
+    "renewal": insert_renewal_batch,
+}
+
+
+class GroupCommitWriter:
+    """Batches single-row inserts from many requests into multi-row INSERTs and one commit.
+
+    A request blocks in submit() until its batch commits and gets its own
+    ids back. One flusher thread per process drains the queue once it holds
+    max_rows writes or the oldest has waited max_delay. If a batch fails on
+    bad data, each write is retried in its own transaction so one bad row
+    only fails its own request; connection and pool errors fail the batch.
+    A write that times out before its batch starts is dropped, so the
+    client's retry cannot duplicate it.
+    """
+
+    def __init__(self, max_rows, max_delay):
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.batches = 0
+        self.rows = 0
+        self.largest_batch = 0
+        self.batch_failures = 0
+        self.flush_seconds = 0.0
+
+    def ensure_started(self):
+        with self._lock:
+            # A forked worker inherits the object but not the thread.
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+                self._thread.start()
+
+    def submit(self, kind, values, timeout):
+        """Queue one row and wait for its batch; returns the row's ids or raises the batch's error."""
+        write = PendingWrite(kind, values)
+        self.ensure_started()
+        self._queue.put(write)
+        if not write.done.wait(timeout):
+            with self._lock:
+                if not write.claimed:
+                    write.cancelled = True
+            if write.cancelled:
+                raise TimeoutError(f"Batched write not committed within {timeout}s")
+            # Its batch is already committing; the outcome is decided, so report it.
+            write.done.wait()
+        if write.error is not None:
+            raise write.error
+        return write.result
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_rows:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._flush(batch)
+
+    def _flush(self, batch):
+        with self._lock:
+            batch = [write for write in batch if not write.cancelled]
+            for write in batch:
+                write.claimed = True
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        try:
+            self._commit(batch)
+        except (psycopg2.IntegrityError, psycopg2.DataError):
+            with self._lock:
+                self.batch_failures += 1
+            for write in batch:
+                try:
+                    self._commit([write])
+                except Exception as e:
+                    write.error = e
+        except Exception as e:
+            # Retrying row by row against a down database or an exhausted pool would only
+            # stall the flusher for len(batch) timeouts.
+            with self._lock:
+                self.batch_failures += 1
+            for write in batch:
+                write.error = e
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.batches += 1
+                self.rows += len(batch)
+                self.largest_batch = max(self.largest_batch, len(batch))
+                self.flush_seconds += elapsed
+            for write in batch:
+                write.done.set()
+
+    def _commit(self, writes):
+        by_kind = {}
+        for write in writes:
+            by_kind.setdefault(write.kind, []).append(write)
+        with get_db_connection() as conn:
+            try:
+                cur = conn.cursor()
+                for kind, kind_writes in by_kind.items():
+                    WRITE_BATCH_HANDLERS[kind](cur, kind_writes)
+                conn.commit()
+                cur.close()
+            except Exception:
+                conn.rollback()
+                raise
+        dashboard_stats_cache.invalidate()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": app.config["WRITE_BATCHING"],
+                "batches": self.batches,
+                "rows": self.rows,
+                "average_batch": round(self.rows / self.batches, 2) if self.batches else None,
+                "largest_batch": self.largest_batch,
+                "batch_failures": self.batch_failures,
+                "average_flush_ms": round(self.flush_seconds * 1000 / self.batches, 3) if self.batches else None,
+                "queued": self._queue.qsize(),
+            }
+
+
+group_commit_writer = GroupCommitWriter(app.config["WRITE_BATCH_MAX_ROWS"], app.config["WRITE_BATCH_MAX_DELAY"])
+
+
+# -----------------------------
+# Query Helpers
+# -----------------------------
+
+def parse_bool(value):
+    """Parse a query-string boolean such as 'true', '0' or 'no'."""
+    lowered = value.strip().lower()
+    if lowered in ("true", "1", "yes"):
+        return True
+    if lowered in ("false", "0", "no"):
+        return False
+    raise ValueError(f"Invalid boolean value: {value}")
+
+
+def build_application_filters(args, alias=""):
+    """Translate list-view query parameters into SQL WHERE clauses and parameters.
+
+    Supported filters: status, archived, year_applied, course, baranggay.
+    Raises ValueError on malformed values.
+    """
+    prefix = f"{alias}." if alias else ""
+    clauses = []
+    values = []
+
+    if args.get('status'):
+        clauses.append(f"{prefix}status = %s")
+        values.append(args['status'].lower())
+    if args.get('archived'):
+        clauses.append(f"{prefix}archived = %s")
+        values.append(parse_bool(args['archived']))
+    if args.get('year_applied'):
+        clauses.append(f"{prefix}year_applied = %s")
+        values.append(int(args['year_applied']))
+    if args.get('course'):
+        clauses.append(f"{prefix}course = %s")
+        values.append(args['course'])
+    if args.get('baranggay'):
+        clauses.append(f"{prefix}baranggay = %s")
+        values.append(args['baranggay'])
+
+    return clauses, values
+
+
+def parse_fields(args, allowed, default=None, required=()):
+    """Return the columns named by ``?fields=a,b,c``, checked against ``allowed``.
+
+    Columns in ``required`` are always included. Without the parameter,
+    ``default`` is returned. Raises ValueError on unknown names.
+    """
+    if not args.get('fields'):
+        return default
+    fields = list(required)
+    for name in args['fields'].split(','):
+        name = name.strip()
+        if not name:
+            continue
+        if name not in allowed:
+            raise ValueError(f"Unknown field: {name}")
+        if name not in fields:
+            fields.append(name)
+    return fields
+
+
+def column_list(fields):
+    """Render parsed fields for a SELECT or RETURNING clause."""
+    return ", ".join(fields)
+
+
+def execute_returning(cur, name, params, fields=None):
+    """Run a registered ``... RETURNING`` statement, narrowed to ``fields`` when given.
+
+    Narrowed variants are executed unprepared, since the column list varies per request.
+    """
+    if fields is None:
+        prepared_statements.execute(cur, name, params)
+        return
+    sql = prepared_statements.statements[name][0].rsplit(" RETURNING ", 1)[0]
+    cur.execute(f"{sql} RETURNING {column_list(fields)}", params)
+
+
+def parse_page_size(args):
+    """Return the requested page size, clamped to PAGE_SIZE_MAX."""
+    try:
+        limit = int(args.get('limit', app.config["PAGE_SIZE_DEFAULT"]))
+    except ValueError:
+        raise ValueError("limit must be an integer") from None
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return min(limit, app.config["PAGE_SIZE_MAX"])
+
+
+def encode_cursor(*parts):
+    """Encode a keyset position as an opaque URL-safe token; datetimes become ISO strings."""
+    payload = json.dumps([part.isoformat() if isinstance(part, datetime.datetime) else part for part in parts])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(token, parse):
+    """Decode a token from encode_cursor, converting each part with the matching callable in ``parse``.
+
+    Raises ValueError for tokens that don't decode or don't have that shape.
+    """
+    try:
+        parts = json.loads(base64.urlsafe_b64decode(token.encode()))
+        if not isinstance(parts, list) or len(parts) != len(parse):
+            raise ValueError("wrong number of parts")
+        return tuple(convert(part) for convert, part in zip(parse, parts))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+# /mayor/applications position: (submission_date, application_id)
+APPLICATION_CURSOR = (datetime.datetime.fromisoformat, int)
+
+
+def mayor_applications_query(clauses, fields=MAYOR_APPLICATION_FIELDS):
+    """Build the mayor list query; callers append LIMIT when paging.
+
+    Keyset paging relies on submission_date being NOT NULL; see
+    database/migration_require_submission_date.sql.
+    """
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return f"""SELECT {column_list(fields)} 
+        FROM application {where}
+        ORDER BY submission_date DESC, application_id DESC"""
+
+
+# Columns shared by application and renew, as served by /mayor/scholar-records
+RECORD_FIELDS = tuple(field for field in RENEWAL_FIELDS if field in APPLICATION_FIELDS)
+
+# record type -> (table, id column, status expression); renewal statuses are stored capitalized
+RECORD_SOURCES = {
+    "application": ("application", "application_id", "status"),
+    "renewal": ("renew", "renewal_id", "LOWER(status)"),
+}
+
+
+def scholar_records_query(record_types, fields, filters, cursor=None, limit=None):
+    """Build one UNION ALL over application and renew, newest first; returns (query, params).
+
+    ``filters`` maps column to value and applies to every branch. ``cursor``
+    is a (submission_date, record_type, record_id) position to continue
+    after. With ``limit`` each branch is limited before the merge, so both
+    walk their submission_date index and the merge sorts at most 2 * limit rows.
+    """
+    branches = []
+    params = []
+    for record_type in record_types:
+        table, id_column, status = RECORD_SOURCES[record_type]
+        columns = [f"{status} AS status" if field == "status" else field for field in fields]
+        clauses = []
+        for column, value in filters.items():
+            clauses.append(f"{status if column == 'status' else column} = %s")
+            params.append(value)
+        if cursor:
+            submitted, cursor_type, cursor_id = cursor
+            if record_type == cursor_type:
+                clauses.append(f"(submission_date, {id_column}) < (%s, %s)")
+                params.extend([submitted, cursor_id])
+            else:
+                # Ties on submission_date order by record_type descending.
+                clauses.append("submission_date < %s" if record_type > cursor_type else "submission_date <= %s")
+                params.append(submitted)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        branch = f"""SELECT '{record_type}' AS record_type, {id_column} AS record_id, {', '.join(columns)} 
+            FROM {table} {where}
+            ORDER BY submission_date DESC, {id_column} DESC"""
+        if limit:
+            branch += " LIMIT %s"
+            params.append(limit)
+        branches.append(f"({branch})")
+
+    query = f"""SELECT * FROM ({" UNION ALL ".join(branches)}) records
+        ORDER BY submission_date DESC, record_type DESC, record_id DESC"""
+    if limit:
+        query += " LIMIT %s"
+        params.append(limit)
+    return query, params
+
+
+def parse_record_type(record_type):
+    if record_type not in RECORD_SOURCES:
+        raise ValueError(f"type must be one of: {', '.join(RECORD_SOURCES)}")
+    return record_type
+
+
+def parse_record_types(args):
+    """Return the record types selected by ``?type=``; both by default."""
+    record_type = args.get('type')
+    return [parse_record_type(record_type)] if record_type else list(RECORD_SOURCES)
+
+
+# /mayor/scholar-records position: (submission_date, record_type, record_id)
+RECORD_CURSOR = (datetime.datetime.fromisoformat, parse_record_type, int)
+
+
+def build_record_filters(args, archived_default="false"):
+    """Translate scholar-records query parameters into the filters for scholar_records_query.
+
+    Supported filters: archived, status, course, baranggay. Pass
+    ``archived_default=None`` to include archived rows unless asked
+    otherwise. Raises ValueError on malformed values.
+    """
+    filters = {}
+    archived = args.get('archived', archived_default)
+    if archived is not None:
+        filters["archived"] = parse_bool(archived)
+    if args.get('status'):
+        filters["status"] = args['status'].lower()
+    for column in ("course", "baranggay"):
+        if args.get(column):
+            filters[column] = args[column]
+    return filters
+
+
+# record type -> (table, id column, school_name expression); see migration_add_search_index.sql
+SEARCH_SOURCES = {
+    "application": ("application", "application_id", "school_name"),
+    "renewal": ("renew", "renewal_id", "NULL::varchar"),
+}
+
+SEARCH_MAX_TERMS = 8
+
+
+def parse_search_terms(text):
+    """Turn free text into a tsquery string where every word matches as a prefix."""
+    terms = re.findall(r"[^\W_]+", (text or "").lower())[:SEARCH_MAX_TERMS]
+    if not terms:
+        raise ValueError("q must contain at least one letter or digit")
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+# /search position: (score, record_type, record_id); SEARCH_SOURCES has the same record types
+SEARCH_CURSOR = (float, parse_record_type, int)
+
+
+def applicant_search_query(record_types, clauses, after_cursor=False):
+    """Build the /search query over ``record_types``, best match first; callers supply LIMIT.
+
+    Parameters are, per record type, the tsquery string followed by the
+    values for ``clauses``; then the cursor triple if ``after_cursor``; then
+    the limit.
+    """
+    branches = []
+    for record_type in record_types:
+        table, id_column, school_name = SEARCH_SOURCES[record_type]
+        where = " AND ".join(["search_vector @@ search_query"] + clauses)
+        branches.append(f"""SELECT '{record_type}' AS record_type, {id_column} AS record_id, 
+            application_id, user_id, first_name, middle_name, last_name, student_id, 
+            baranggay, {school_name} AS school_name, status, archived, submission_date, 
+            ts_rank(search_vector, search_query) AS score 
+            FROM {table}, to_tsquery('simple', %s) search_query 
+            WHERE {where}""")
+    after = "WHERE (score, record_type, record_id) < (%s::real, %s, %s)" if after_cursor else ""
+    return f"""SELECT * FROM ({" UNION ALL ".join(branches)}) results {after}
+        ORDER BY score DESC, record_type DESC, record_id DESC
+        LIMIT %s"""
+
+
+def stream_json_rows(key, query, params, transform=dict, readonly=True, conn=None):
+    """Stream ``{key: [rows...]}`` from a server-side cursor without materializing the result.
+
+    The query runs before the response starts so connection and SQL errors
+    still surface as a normal 500; rows are then fetched STREAM_BATCH_SIZE
+    at a time and encoded one by one. A ``conn`` passed in is owned (and
+    released) by the stream.
+    """
+    batch_size = app.config["STREAM_BATCH_SIZE"]
+    if conn is None:
+        conn = get_db_connection(readonly=readonly)
+    try:
+        cur = conn.cursor(name="stream_json_rows", cursor_factory=RealDictCursor)
+        cur.execute(query, params)
+        # Named cursors defer the first fetch; pull it now so errors happen before streaming.
+        # Each fetchmany() is one FETCH round trip, whereas fetchone() would be one per row.
+        rows = cur.fetchmany(batch_size)
+    except Exception:
+        conn.close()
+        raise
+
+    def generate():
+        nonlocal rows
+        try:
+            yield '{"%s": [' % key
+            separator = ""
+            while rows:
+                for row in rows:
+                    yield separator + app.json.dumps(transform(row))
+                    separator = ","
+                rows = cur.fetchmany(batch_size)
+            yield "]}"
+        finally:
+            cur.close()
+            conn.close()
+
+    response = Response(stream_with_context(generate()), mimetype="application/json")
+    # Releases the connection even if the client disconnects before the first chunk.
+    response.call_on_close(conn.close)
+    return response
+
+
+# -----------------------------
+# Export Helpers
+# -----------------------------
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+# Characters that make spreadsheet apps treat a cell as a formula
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+# Characters XML 1.0 does not allow, even escaped
+XML_ILLEGAL_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+XLSX_STATIC_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="xl/workbook.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Export" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def csv_cell(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_chunks(columns, batches):
+    """Yield CSV text, header first, then one chunk per batch of rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for rows in batches:
+        writer.writerows([csv_cell(value) for value in row] for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def xlsx_cell(value):
+    if value is None:
+        return "<c/>"
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, decimal.Decimal)):
+        return f"<c><v>{value}</v></c>"
+    text = value.isoformat(" ") if isinstance(value, datetime.datetime) else str(value)
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{xml_escape(XML_ILLEGAL_RE.sub("", text))}</t></is></c>'
+
+
+def xlsx_row(values):
+    return ("<row>" + "".join(xlsx_cell(value) for value in values) + "</row>").encode()
+
+
+class ZipSink:
+    """Write-only, unseekable file object; zipfile then emits a streamable archive."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def xlsx_chunks(columns, batches):
+    """Yield a single-sheet XLSX workbook, one chunk per batch of rows.
+
+    The workbook is zipped as it is written, with inline strings and no
+    shared-string table, so nothing accumulates in memory. Excel stops at
+    1,048,576 rows; larger exports should use CSV.
+    """
+    sink = ZipSink()
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as workbook:
+        for name, xml in XLSX_STATIC_PARTS.items():
+            workbook.writestr(name, xml)
+        with workbook.open("xl/worksheets/sheet1.xml", "w") as sheet:
+            sheet.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                        b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+            sheet.write(xlsx_row(columns))
+            for rows in batches:
+                for row in rows:
+                    sheet.write(xlsx_row(row))
+                yield sink.drain()
+            sheet.write(b"</sheetData></worksheet>")
+    yield sink.drain()
+
+
+def export_response(columns, batches, export_format, filename):
+    """Return a streamed CSV or XLSX attachment of ``batches`` (iterables of row tuples)."""
+    write = csv_chunks if export_format == "csv" else xlsx_chunks
+    response = Response(stream_with_context(write(columns, batches)), mimetype=EXPORT_FORMATS[export_format])
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}.{export_format}"'
+    return response
+
+
+def parse_export_format(args):
+    export_format = args.get('format', 'csv').lower()
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    return export_format
+
+
+def stream_export(queries, export_format, filename, conn):
+    """Stream the rows of ``queries`` ((query, params) pairs with the same columns) as one download.
+
+    Each query runs on its own server-side cursor, one after another. Like
+    stream_json_rows, the first STREAM_BATCH_SIZE rows are fetched before
+    the response starts, and the stream owns and releases ``conn``.
+    """
+    batch_size = app.config["STREAM_BATCH_SIZE"]
+
+    def open_cursor(query, params):
+        cur = conn.cursor(name="stream_export")
+        cur.execute(query, params)
+        return cur, cur.fetchmany(batch_size)
+
+    try:
+        cur, first = open_cursor(*queries[0])
+        columns = [column.name for column in cur.description]
+    except Exception:
+        conn.close()
+        raise
+
+    def batches():
+        nonlocal cur
+        try:
+            rows = first
+            remaining = list(queries[1:])
+            while True:
+                while rows:
+                    yield rows
+                    rows = cur.fetchmany(batch_size)
+                if not remaining:
+                    break
+                cur.close()
+                cur, rows = open_cursor(*remaining.pop(0))
+        finally:
+            cur.close()
+            conn.close()
+
+    response = export_response(columns, batches(), export_format, filename)
+    response.call_on_close(conn.close)
+    return response
+
+# -----------------------------
+# Document Storage
+# -----------------------------
+
+# Upload type -> column in application and renew
+DOCUMENT_COLUMNS = {
+    "school_id": "school_id_path",
+    "id_picture": "id_picture_path",
+    "birth_certificate": "birth_certificate_path",
+    "grades": "grades_path",
+    "cor": "cor_path",
+}
+
+# Accepted formats, recognised by their leading bytes rather than the client's Content-Type
+DOCUMENT_SIGNATURES = [
+    (b"%PDF-", "pdf", "application/pdf"),
+    (b"\x89PNG\r\n\x1a\n", "png", "image/png"),
+    (b"\xff\xd8\xff", "jpg", "image/jpeg"),
+]
+
+
+DOCUMENT_NAME_RE = re.compile(r"^[0-9a-f]{64}\.(pdf|png|jpg)$")
+
+DOCUMENT_CONTENT_TYPES = {extension: content_type for _, extension, content_type in DOCUMENT_SIGNATURES}
+
+
+class DocumentTooLarge(ValueError):
+    pass
+
+
+class UnsupportedDocumentType(ValueError):
+    pass
+
+
+def sniff_document_type(head):
+    """Return (extension, content type) for the first bytes of a document, or raise UnsupportedDocumentType."""
+    for signature, extension, content_type in DOCUMENT_SIGNATURES:
+        if head.startswith(signature):
+            return extension, content_type
+    raise UnsupportedDocumentType("Documents must be PDF, PNG or JPEG files")
+
+
+class DocumentStore:
+    """Content-addressed files under ``root``, named by SHA-256 so each document is stored once.
+
+    Uploads are written to a temporary file in the same directory tree while
+    being hashed, then renamed into place; a document that already exists is
+    kept and the new copy discarded.
+    """
+
+    SNIFF_BYTES = 16
+
+    def __init__(self, root):
+        self.root = root
+        self._tmp = os.path.join(root, "tmp")
+        os.makedirs(self._tmp, exist_ok=True)
+
+    def path_for(self, name):
+        """Filesystem path of a stored document name such as ``<sha256>.pdf``."""
+        return os.path.join(self.root, name[:2], name[2:4], name)
+
+    def save(self, chunks, max_bytes):
+        """Store the bytes from ``chunks``; returns a dict describing the stored document."""
+        digest = hashlib.sha256()
+        size = 0
+        head = b""
+        fd, tmp_path = tempfile.mkstemp(dir=self._tmp)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise DocumentTooLarge(f"Documents are limited to {max_bytes} bytes")
+                    if len(head) < self.SNIFF_BYTES:
+                        head += chunk[:self.SNIFF_BYTES]
+                    digest.update(chunk)
+                    f.write(chunk)
+            extension, content_type = sniff_document_type(head)
+
+            name = f"{digest.hexdigest()}.{extension}"
+            path = self.path_for(name)
+            deduplicated = os.path.exists(path)
+            if deduplicated:
+                os.unlink(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.chmod(tmp_path, 0o644)
+                # Atomic; concurrent uploads of the same bytes just replace identical content.
+                os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        return {
+            "name": name,
+            "sha256": digest.hexdigest(),
+            "size": size,
+            "content_type": content_type,
+            "deduplicated": deduplicated,
+        }
+
+
+_document_store = None
+
+
+def get_document_store():
+    global _document_store
+    if _document_store is None or _document_store.root != app.config["DOCUMENT_STORE_DIR"]:
+        _document_store = DocumentStore(app.config["DOCUMENT_STORE_DIR"])
+    return _document_store
+
+
+def iter_multipart_file(stream, boundary, field_name, chunk_size):
+    """Yield the bytes of the ``field_name`` file part of a multipart body as they arrive.
+
+    Parses ``stream`` incrementally, so neither the body nor the file is
+    held in memory. Raises ValueError if the part is missing.
+    """
+    # The decoder's buffer holds at most one read plus a partial boundary.
+    decoder = MultipartDecoder(boundary.encode(), max_form_memory_size=2 * chunk_size, max_parts=16)
+    in_file = False
+    found = False
+    while True:
+        event = decoder.next_event()
+        if isinstance(event, NeedData):
+            decoder.receive_data(stream.read(chunk_size) or None)
+        elif isinstance(event, File):
+            in_file = event.name == field_name and not found
+            found = found or in_file
+        elif isinstance(event, Data):
+            if in_file and event.data:
+                yield event.data
+            if not event.more_data:
+                in_file = False
+        elif isinstance(event, Epilogue):
+            break
+    if not found:
+        raise ValueError(f"Multipart body has no '{field_name}' file")
+
+
+# -----------------------------
+# Document Previews
+# -----------------------------
+
+def render_derivative(source, target, max_size):
+    """Write a JPEG of ``source`` (an image, or a PDF's first page) fitting in max_size pixels.
+
+    Runs in a PreviewPipeline worker process.
+    """
+    if source.endswith(".pdf"):
+        pdf = pypdfium2.PdfDocument(source)
+        try:
+            page = pdf[0]
+            scale = max_size / max(page.get_size())  # the page size is in points, 1 point = 1 pixel at scale 1
+            image = page.render(scale=scale).to_pil()
+        finally:
+            pdf.close()
+    else:
+        image = Image.open(source)
+        image.draft("RGB", (max_size, max_size))  # lets JPEG decode at a reduced size
+        image = ImageOps.exif_transpose(image)
+    image.thumbnail((max_size, max_size))
+
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    elif image.mode != "RGB":
+        image = image.convert("RGB")
+
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    image.save(tmp_path, "JPEG", quality=80, optimize=True)
+    os.replace(tmp_path, target)
+
+
+def preview_supported(name):
+    if Image is None:
+        return False
+    return not name.endswith(".pdf") or pypdfium2 is not None
+
+
+class PreviewPipeline:
+    """Makes downscaled JPEGs of stored documents on a process pool, cached on disk by content hash.
+
+    Concurrent requests for the same derivative share one job. The pool is
+    created lazily in each process and uses spawn, since forking a threaded
+    server is unsafe.
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._pending = {}  # target path -> Future
+        self.generated = 0
+        self.cache_hits = 0
+        self.failures = 0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+                self._pid = os.getpid()
+                self._pending = {}
+            return self._executor
+
+    @staticmethod
+    def derivative_path(store, name, variant):
+        digest = name.split(".")[0]
+        return os.path.join(store.root, "derived", digest[:2], f"{digest}-{variant}.jpg")
+
+    def ensure(self, name, variant):
+        """Return (path, future); the future is None if the derivative is already on disk."""
+        store = get_document_store()
+        target = self.derivative_path(store, name, variant)
+        if os.path.exists(target):
+            with self._lock:
+                self.cache_hits += 1
+            return target, None
+
+        executor = self._get_executor()
+        with self._lock:
+            future = self._pending.get(target)
+            if future is None:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                future = executor.submit(render_derivative, store.path_for(name), target,
+                                         app.config["PREVIEW_VARIANTS"][variant])
+                self._pending[target] = future
+                future.add_done_callback(lambda f: self._finished(target, f))
+        return target, future
+
+    def _finished(self, target, future):
+        with self._lock:
+            self._pending.pop(target, None)
+            if future.exception() is None:
+                self.generated += 1
+            else:
+                self.failures += 1
+                app.logger.warning("Could not render %s: %s", target, future.exception())
+
+    def get(self, name, variant, timeout):
+        """Return the derivative's path, rendering it first if needed."""
+        target, future = self.ensure(name, variant)
+        if future is not None:
+            future.result(timeout)
+        return target
+
+    def schedule(self, name):
+        """Queue every variant of a document in the background; returns the futures still running."""
+        if not preview_supported(name):
+            return []
+        futures = [self.ensure(name, variant)[1] for variant in app.config["PREVIEW_VARIANTS"]]
+        return [future for future in futures if future is not None]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "pending": len(self._pending),
+                "generated": self.generated,
+                "cache_hits": self.cache_hits,
+                "failures": self.failures,
+            }
+
+
+preview_pipeline = PreviewPipeline(app.config["PREVIEW_WORKERS"])
+
+
+# -----------------------------
+# In-memory Repositories
+# -----------------------------
+
+class DuplicateKeyError(ValueError):
+    """Raised when a row would repeat a value of a unique field."""
+
+    def __init__(self, field, value):
+        super().__init__(f"{field} already exists: {value}")
+        self.field = field
+        self.value = value
+
+
+class InMemoryRepository:
+    """Thread-safe in-memory table of dict rows with an auto-increment id.
+
+    Rows are hash-indexed by id, by each ``unique`` field and by each
+    ``indexed`` field, so lookups and counts don't scan. ``version`` is
+    bumped on every write for ETags. The methods mirror what a database
+    backed repository would offer, so routes can switch to one later.
+    """
+
+    def __init__(self, id_field, rows=(), unique=(), indexed=()):
+        self.id_field = id_field
+        self.version = 0
+        self._lock = threading.Lock()
+        self._rows = {}  # id -> row, in insertion order
+        self._unique = {field: {} for field in unique}  # field -> value -> row
+        self._indexed = {field: {} for field in indexed}  # field -> value -> {id: row}
+        self._next_id = 1
+        for row in rows:
+            self._insert(dict(row))
+
+    def _insert(self, row):
+        if row.get(self.id_field) is None:
+            row[self.id_field] = self._next_id
+        row_id = row[self.id_field]
+        if row_id in self._rows:
+            raise DuplicateKeyError(self.id_field, row_id)
+        for field, index in self._unique.items():
+            if row.get(field) in index:
+                raise DuplicateKeyError(field, row.get(field))
+
+        self._rows[row_id] = row
+        for field, index in self._unique.items():
+            index[row.get(field)] = row
+        for field, index in self._indexed.items():
+            index.setdefault(row.get(field), {})[row_id] = row
+        self._next_id = max(self._next_id, row_id + 1)
+        return row
+
+    def add(self, row):
+        """Insert a copy of ``row``, assigning the next id if it has none, and return it."""
+        with self._lock:
+            row = self._insert(dict(row))
+            self.version += 1
+            return row
+
+    def get(self, row_id):
+        return self._rows.get(row_id)
+
+    def get_by(self, field, value):
+        """Return the row whose unique ``field`` equals ``value``, or None."""
+        return self._unique[field].get(value)
+
+    def filter_by(self, field, value):
+        """Return the rows whose indexed ``field`` equals ``value``, oldest first."""
+        with self._lock:
+            return list(self._indexed[field].get(value, {}).values())
+
+    def count_by(self, field, value):
+        with self._lock:
+            return len(self._indexed[field].get(value, ()))
+
+    def all(self):
+        with self._lock:
+            return list(self._rows.values())
+
+    def __len__(self):
+        return len(self._rows)
 
-# Database connection
-def get_db_connection():
-    # Temporarily disabled - update password first
-    # conn = psycopg2.connect(
-    #     host="localhost",
-    #     database="usersdb",
-    #     user="postgres",
-    #     password="your_password"  # Change this to your actual password
-    # )
-    # return conn
-    raise Exception("Database not configured")
 
 # Mock data for users (authentication)
-users = [
+users = InMemoryRepository("user_id", [
     {"user_id": 1, "name": "John Doe", "email": "john@example.com", "password": "admin123", "user_type": "admin"},
     {"user_id": 2, "name": "Jane Smith", "email": "jane@example.com", "password": "student123", "user_type": "student"},
     {"user_id": 3, "name": "Carlos Perez", "email": "carlos@example.com", "password": "student123", "user_type": "student"},
     {"user_id": 4, "name": "Mayor Johnson", "email": "mayor@example.com", "password": "mayor123", "user_type": "mayor"},
-]
+], unique=("email",), indexed=("user_type",))
 
 # Mock data for students/scholars
-students = [
+students = InMemoryRepository("id", [
     {"id": 1, "name": "Jane Smith", "email": "jane@example.com", "course": "Computer Science", "year": 2},
     {"id": 2, "name": "Carlos Perez", "email": "carlos@example.com", "course": "Engineering", "year": 3},
     {"id": 3, "name": "Maria Lopez", "email": "maria@example.com", "course": "Business", "year": 1},
-]
+])
 
 # Mock data for scholarship applications
-applications = [
+applications = InMemoryRepository("app_id", [
     {"app_id": 1, "student_id": 2, "student_name": "Jane Smith", "status": "Pending", "type": "New Application", "date": "2024-12-01"},
     {"app_id": 2, "student_id": 3, "student_name": "Carlos Perez", "status": "Approved", "type": "Renewal", "date": "2024-11-28"},
     {"app_id": 3, "student_id": 1, "student_name": "Maria Lopez", "status": "Under Review", "type": "New Application", "date": "2024-12-05"},
-]
+], indexed=("status",))
 
 # Mock data for scholarship records
-scholarship_records = [
+scholarship_records = InMemoryRepository("record_id", [
     {"record_id": 1, "student_id": 2, "student_name": "Jane Smith", "scholarship_type": "Academic", "amount": 10000, "semester": "1st Semester 2024"},
     {"record_id": 2, "student_id": 3, "student_name": "Carlos Perez", "scholarship_type": "Financial Aid", "amount": 15000, "semester": "1st Semester 2024"},
-]
+])
 
 # Home route
 @app.route('/')
@@ -56,6 +2037,577 @@ def home():
     return jsonify({"message": "Student Dashboard API is running!"})
 
 
+# -----------------------------
+# Conditional GET Helpers
+# -----------------------------
+
+def make_etag(*parts):
+    return hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def table_etag(conn, *tables):
+    """ETag for the current request derived from the tables' change counters.
+
+    Every write statement adds status_count_deltas rows, and compaction
+    moves their number into status_counts.version, so a table's version is
+    the compacted versions plus its pending deltas.
+
+    Read it on the same connection as the body, before the body, so a
+    replica can never pair a newer version with older rows.
+    """
+    cur = conn.cursor()
+    prepared_statements.execute(cur, "table_versions", (list(tables),))
+    versions = sorted(cur.fetchall())
+    cur.close()
+    return make_etag(request.full_path, versions)
+
+
+def not_modified(etag):
+    """Return a 304 response if the client already holds ``etag``, else None."""
+    # Weak comparison, since compressed responses carry the weak form of the tag.
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    return None
+
+
+def with_etag(response, etag):
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+# -----------------------------
+# Response Compression
+# -----------------------------
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/csv", "text/plain", "text/html"}
+
+
+class CompressedBodyCache:
+    """LRU of compressed bodies keyed by (ETag, encoding), bounded by total bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, body):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._entries[key] = body
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+
+compressed_body_cache = CompressedBodyCache(app.config["COMPRESS_CACHE_BYTES"])
+
+
+def make_compressor(encoding):
+    """Return (compress(chunk), flush()) callables for ``encoding``."""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=5)
+        return compressor.process, compressor.finish
+    compressor = zlib.compressobj(app.config["COMPRESS_LEVEL"], zlib.DEFLATED, 31)  # 31 = gzip container
+    return compressor.compress, compressor.flush
+
+
+def compress_stream(chunks, encoding):
+    compress, flush = make_compressor(encoding)
+    for chunk in chunks:
+        data = compress(chunk.encode() if isinstance(chunk, str) else chunk)
+        if data:
+            yield data
+    yield flush()
+
+
+@app.after_request
+def compress_response(response):
+    """gzip/brotli-encode JSON and text responses the client accepts."""
+    if (response.status_code < 200 or response.status_code in (204, 304)
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    offers = ["br", "gzip"] if brotli is not None else ["gzip"]
+    encoding = request.accept_encodings.best_match(offers)
+    response.vary.add("Accept-Encoding")
+    if encoding is None:
+        return response
+
+    etag, weak = response.get_etag()
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encoding)
+        response.headers.pop("Content-Length", None)
+    else:
+        if response.content_length is not None and response.content_length < app.config["COMPRESS_MIN_SIZE"]:
+            return response
+        cache_key = (etag, encoding) if etag else None
+        body = compressed_body_cache.get(cache_key) if cache_key else None
+        if body is None:
+            compress, flush = make_compressor(encoding)
+            body = compress(response.get_data()) + flush()
+            if cache_key:
+                compressed_body_cache.put(cache_key, body)
+        response.set_data(body)
+
+    response.headers["Content-Encoding"] = encoding
+    if etag and not weak:
+        # The encoded bytes differ from the identity representation, so only a weak match holds.
+        response.set_etag(etag, weak=True)
+    return response
+
+
+# -----------------------------
+# Authentication Middleware
+# -----------------------------
+
+class RevokedTokenError(jwt.InvalidTokenError):
+    """Raised for a token that was logged out before it expired."""
+
+
+class TokenCache:
+    """Bounded LRU of verified JWT claims keyed by token hash, plus a revocation set.
+
+    A cached entry is dropped once its token's ``exp`` passes, so a hit never
+    outlives the token. Revocations are kept until the token would have
+    expired anyway. The revocation set mirrors the shared revoked_tokens
+    table through notifications; ``revocation_check(key)`` is asked on every
+    lookup and can consult shared state when that mirror may be stale.
+    """
+
+    SWEEP_INTERVAL = 60
+
+    def __init__(self, max_size, revocation_check=None):
+        self.max_size = max_size
+        self.revocation_check = revocation_check
+        self._entries = OrderedDict()  # token hash -> claims
+        self._revoked = {}  # token hash -> exp
+        self._lock = threading.Lock()
+        self._next_sweep = time.time() + self.SWEEP_INTERVAL
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.rejected_invalid = 0
+        self.rejected_revoked = 0
+
+    @staticmethod
+    def key_for(token):
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def _check_shared_revocation(self, key):
+        if self.revocation_check is not None and self.revocation_check(key):
+            with self._lock:
+                self._revoked.setdefault(key, float("inf"))
+                self._entries.pop(key, None)
+                self.rejected_revoked += 1
+            raise RevokedTokenError("Token revoked")
+
+    def verify(self, token):
+        """Return the claims of ``token``, raising jwt.InvalidTokenError if it can't be used."""
+        if not isinstance(token, str):
+            raise jwt.DecodeError("Invalid token type")
+        key = self.key_for(token)
+        now = time.time()
+        with self._lock:
+            if key in self._revoked:
+                self.rejected_revoked += 1
+                raise RevokedTokenError("Token revoked")
+            claims = self._entries.get(key)
+            if claims is not None and claims.get("exp", float("inf")) <= now:
+                del self._entries[key]
+                self.expirations += 1
+                claims = None
+        if claims is not None:
+            self._check_shared_revocation(key)
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                self.hits += 1
+            return claims
+        with self._lock:
+            self.misses += 1
+
+        try:
+            claims = jwt.decode(token, app.config["SECRET_KEY"], algorithms=["HS256"])
+        except jwt.InvalidTokenError:
+            with self._lock:
+                self.rejected_invalid += 1
+            raise
+        self._check_shared_revocation(key)
+
+        with self._lock:
+            if key in self._revoked:  # logged out while we were decoding
+                self.rejected_revoked += 1
+                raise RevokedTokenError("Token revoked")
+            self._entries[key] = claims
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            if now >= self._next_sweep:
+                self._sweep(now)
+        return claims
+
+    def revoke(self, token, claims):
+        self.add_revocation(self.key_for(token), claims.get("exp", float("inf")))
+
+    def add_revocation(self, key, exp):
+        with self._lock:
+            self._revoked[key] = exp
+            self._entries.pop(key, None)
+
+    def _sweep(self, now):
+        for key in [k for k, claims in self._entries.items() if claims.get("exp", float("inf")) <= now]:
+            del self._entries[key]
+            self.expirations += 1
+        for key in [k for k, exp in self._revoked.items() if exp <= now]:
+            del self._revoked[key]
+        self._next_sweep = now + self.SWEEP_INTERVAL
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "revoked": len(self._revoked),
+                "rejected_invalid": self.rejected_invalid,
+                "rejected_revoked": self.rejected_revoked,
+            }
+
+
+TOKEN_REVOKED_CHANNEL = "token_revoked"
+
+
+def revoked_in_database(key):
+    """Look a revocation up in the shared table, but only while notifications might be missed."""
+    if notification_listener.connected:
+        return False
+    with get_db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT 1 FROM revoked_tokens WHERE token_hash = %s AND expires_at > NOW()", (key,))
+        found = cur.fetchone() is not None
+        cur.close()
+    return found
+
+
+token_cache = TokenCache(app.config["AUTH_CACHE_SIZE"], revocation_check=revoked_in_database)
+
+
+def revoke_token(token, claims):
+    """Revoke ``token`` in this process now and, through revoked_tokens and NOTIFY, in every worker."""
+    token_cache.revoke(token, claims)
+    key = TokenCache.key_for(token)
+    exp = claims.get("exp", float("inf"))
+    with get_db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("DELETE FROM revoked_tokens WHERE expires_at <= NOW()")
+        cur.execute(
+            """INSERT INTO revoked_tokens (token_hash, expires_at) VALUES (%s, to_timestamp(%s))
+               ON CONFLICT (token_hash) DO NOTHING""",
+            (key, exp)
+        )
+        cur.execute("SELECT pg_notify(%s, %s)", (TOKEN_REVOKED_CHANNEL, json.dumps({"token_hash": key, "exp": exp})))
+        conn.commit()
+        cur.close()
+
+
+def handle_token_revoked(payload):
+    data = json.loads(payload)
+    token_cache.add_revocation(data["token_hash"], data["exp"])
+
+
+def load_revoked_tokens():
+    # Revocations made while this worker wasn't listening.
+    try:
+        with get_db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("""SELECT token_hash, EXTRACT(EPOCH FROM expires_at)::float8
+                           FROM revoked_tokens WHERE expires_at > NOW()""")
+            rows = cur.fetchall()
+            cur.close()
+    except Exception:
+        app.logger.exception("Could not load revoked tokens")
+        return
+    for key, exp in rows:
+        token_cache.add_revocation(key, exp)
+
+
+notification_listener.subscribe(TOKEN_REVOKED_CHANNEL, handle_token_revoked, on_connect=load_revoked_tokens)
+
+# Reachable without a token even when AUTH_REQUIRED is on
+PUBLIC_ENDPOINTS = {"home", "login", "verify_token", "static"}
+
+
+def auth_error(message):
+    response = jsonify({"error": message})
+    response.status_code = 401
+    response.headers["WWW-Authenticate"] = "Bearer"
+    return response
+
+
+@app.before_request
+def authenticate():
+    """Verify the bearer token once per request and expose its claims as ``g.user``."""
+    g.user = None
+    g.token = None
+    if request.method == "OPTIONS":
+        return None
+
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    token = token.strip()
+    public = request.endpoint in PUBLIC_ENDPOINTS
+    if scheme.lower() != "bearer" or not token:
+        if app.config["AUTH_REQUIRED"] and not public:
+            return auth_error("Authentication required")
+        return None
+
+    notification_listener.ensure_started()  # keeps the revocation set in sync with other workers
+    try:
+        g.user = token_cache.verify(token)
+        g.token = token
+    except jwt.ExpiredSignatureError:
+        return None if public else auth_error("Token expired")
+    except RevokedTokenError:
+        return None if public else auth_error("Token revoked")
+    except jwt.InvalidTokenError:
+        return None if public else auth_error("Invalid token")
+    return None
+
+
+# -----------------------------
+# Admission Control
+# -----------------------------
+
+class LocalRateLimitBackend:
+    """Token buckets held in this process; each worker limits on its own."""
+
+    SWEEP_INTERVAL = 60
+
+    def __init__(self):
+        self._buckets = {}  # key -> (tokens, updated_at, full_at)
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + self.SWEEP_INTERVAL
+
+    def consume(self, key, rate, burst):
+        """Take a token from ``key``'s bucket; return 0 if one was available, else seconds until one is."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at, _ = self._buckets.get(key, (burst, now, now))
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+            retry_after = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                retry_after = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+
+            if now >= self._next_sweep:
+                # A bucket that has refilled is the same as no bucket at all.
+                for stale in [k for k, (_, _, full_at) in self._buckets.items() if full_at <= now]:
+                    del self._buckets[stale]
+                self._next_sweep = now + self.SWEEP_INTERVAL
+        return retry_after
+
+
+class RedisRateLimitBackend:
+    """Token buckets in Redis, shared by every worker that points at the same server."""
+
+    # Runs atomically on the server and uses its clock, so workers on different hosts agree.
+    SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(state[1]) or burst
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated_at) * rate)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil((burst - tokens) / rate) + 1)
+return tostring(retry_after)
+"""
+
+    def __init__(self, url):
+        if redis is None:
+            raise RuntimeError("RATE_LIMIT_REDIS_URL is set but the redis package is not installed")
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5)
+        self._script = self._client.register_script(self.SCRIPT)
+
+    def consume(self, key, rate, burst):
+        return float(self._script(keys=[f"ratelimit:{key}"], args=[rate, burst]))
+
+
+class AdmissionController:
+    """Per-user, per-route rate limits plus a cap on write requests in flight.
+
+    The concurrency cap is per process, like the connection pool it protects.
+    A failing rate limit backend admits requests rather than taking writes down.
+    """
+
+    def __init__(self, backend, max_writes):
+        self.backend = backend
+        self.max_writes = max_writes
+        self._slots = threading.BoundedSemaphore(max_writes)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.admitted = 0
+        self.shed_rate_limited = {}  # endpoint -> count
+        self.shed_concurrency = 0
+        self.backend_errors = 0
+
+    def check_rate(self, endpoint, identity, per_minute, burst):
+        """Return 0 if the caller may proceed, else the seconds to wait before retrying."""
+        try:
+            retry_after = self.backend.consume(f"{endpoint}:{identity}", per_minute / 60.0, burst)
+        except Exception as e:
+            with self._lock:
+                self.backend_errors += 1
+            app.logger.warning("Rate limit backend failed, admitting request: %s", e)
+            return 0.0
+        if retry_after:
+            with self._lock:
+                self.shed_rate_limited[endpoint] = self.shed_rate_limited.get(endpoint, 0) + 1
+        return retry_after
+
+    def acquire_write_slot(self, wait):
+        if not self._slots.acquire(timeout=wait):
+            with self._lock:
+                self.shed_concurrency += 1
+            return False
+        with self._lock:
+            self.admitted += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        return True
+
+    def release_write_slot(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": type(self.backend).__name__,
+                "max_writes": self.max_writes,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "admitted": self.admitted,
+                "shed_rate_limited": dict(self.shed_rate_limited),
+                "shed_concurrency": self.shed_concurrency,
+                "backend_errors": self.backend_errors,
+            }
+
+
+_admission_controller = None
+_admission_lock = threading.Lock()
+
+
+def get_admission_controller():
+    global _admission_controller
+    if _admission_controller is None:
+        with _admission_lock:
+            if _admission_controller is None:
+                url = app.config["RATE_LIMIT_REDIS_URL"]
+                backend = RedisRateLimitBackend(url) if url else LocalRateLimitBackend()
+                _admission_controller = AdmissionController(backend, app.config["WRITE_CONCURRENCY_MAX"])
+    return _admission_controller
+
+
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+# Writes that don't touch the database
+ADMISSION_EXEMPT_ENDPOINTS = {"login", "logout", "verify_token"}
+
+# Rate limited, but spend most of their time streaming a body rather than holding a connection
+CONCURRENCY_EXEMPT_ENDPOINTS = {"upload_document"}
+
+
+def request_identity():
+    """Who a rate limit applies to: the token's user, or None for anonymous callers.
+
+    Neither the body's student_id (client-chosen, so it could be rotated or
+    borrowed to lock someone out) nor the address (shared behind NAT and
+    proxies) identifies an anonymous caller well enough to limit them alone.
+    """
+    if g.get("user"):
+        return f"user:{g.user.get('user_id')}"
+    return None
+
+
+def too_many_requests(retry_after, message="Too many requests"):
+    response = jsonify({"error": message, "retry_after": math.ceil(retry_after)})
+    response.status_code = 429
+    response.headers["Retry-After"] = str(max(math.ceil(retry_after), 1))
+    return response
+
+
+@app.before_request
+def admit_request():
+    """Shed write requests over the caller's rate limit or beyond WRITE_CONCURRENCY_MAX with a 429."""
+    g.write_slot = False
+    if request.method not in WRITE_METHODS or request.endpoint in ADMISSION_EXEMPT_ENDPOINTS:
+        return None
+    if request.endpoint is None:  # unknown URL; let routing answer 404/405
+        return None
+
+    controller = get_admission_controller()
+    identity = request_identity()
+    if identity is not None:
+        per_minute, burst = app.config["RATE_LIMITS"].get(request.endpoint, app.config["RATE_LIMIT_DEFAULT"])
+        retry_after = controller.check_rate(request.endpoint, identity, per_minute, burst)
+        if retry_after:
+            return too_many_requests(retry_after)
+    if request.endpoint in CONCURRENCY_EXEMPT_ENDPOINTS:
+        return None
+    if not controller.acquire_write_slot(app.config["WRITE_ADMISSION_WAIT"]):
+        return too_many_requests(1, "Server busy, please retry shortly")
+    g.write_slot = True
+    return None
+
+
+@app.teardown_request
+def release_write_slot(exc):
+    if g.get("write_slot"):
+        g.write_slot = False
+        get_admission_controller().release_write_slot()
+
+
 # -----------------------------
 # Authentication Routes
 # -----------------------------
@@ -68,14 +2620,16 @@ def login():
     password = data.get("password")
 
     # Find user by email and password
-    user = next((u for u in users if u["email"] == email and u["password"] == password), None)
-    if user:
+    user = users.get_by("email", email)
+    if user and user["password"] == password:
         token = jwt.encode(
             {
                 "user_id": user["user_id"],
                 "email": email,
                 "user_type": user["user_type"],
-                "exp": datetime.datetime.utcnow() + datetime.timedelta(hours=2)
+                "exp": datetime.datetime.utcnow() + datetime.timedelta(hours=2),
+                # Unique per login, so logging out never revokes a token issued later
+                "jti": uuid.uuid4().hex
             },
             app.config["SECRET_KEY"],
             algorithm="HS256"
@@ -99,14 +2653,30 @@ def verify_token():
     token = data.get("token")
 
     try:
-        decoded = jwt.decode(token, app.config["SECRET_KEY"], algorithms=["HS256"])
+        decoded = token_cache.verify(token)
         return jsonify({"valid": True, "decoded": decoded})
     except jwt.ExpiredSignatureError:
         return jsonify({"valid": False, "error": "Token expired"})
+    except RevokedTokenError:
+        return jsonify({"valid": False, "error": "Token revoked"})
     except jwt.InvalidTokenError:
         return jsonify({"valid": False, "error": "Invalid token"})
 
 
+@app.route("/logout", methods=["POST", "OPTIONS"])
+def logout():
+    if request.method == "OPTIONS":
+        return jsonify({"status": "ok"}), 200
+    """Revoke the bearer token so it stops working immediately."""
+    if g.user is None:
+        return auth_error("Authentication required")
+    try:
+        revoke_token(g.token, g.user)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    return jsonify({"message": "Logged out"})
+
+
 # -----------------------------
 # Admin Routes
 # -----------------------------
@@ -115,11 +2685,11 @@ def verify_token():
 def admin_dashboard():
     """Get admin dashboard statistics."""
     total_users = len(users)
-    total_students = len([u for u in users if u["user_type"] == "student"])
-    total_admins = len([u for u in users if u["user_type"] == "admin"])
-    total_mayors = len([u for u in users if u["user_type"] == "mayor"])
+    total_students = users.count_by("user_type", "student")
+    total_admins = users.count_by("user_type", "admin")
+    total_mayors = users.count_by("user_type", "mayor")
     total_applications = len(applications)
-    pending_applications = len([a for a in applications if a["status"] == "Pending"])
+    pending_applications = applications.count_by("status", "Pending")
 
     return jsonify({
         "total_users": total_users,
@@ -134,7 +2704,33 @@ def admin_dashboard():
 @app.route("/admin/users", methods=["GET"])
 def admin_users():
     """Return all users for admin."""
-    return jsonify({"data": users})
+    return jsonify({"data": users.all()})
+
+
+@app.route("/admin/db/pool", methods=["GET"])
+def db_pool_stats():
+    """Return connection pool, replica and prepared statement statistics."""
+    router = get_replica_router()
+    return jsonify({
+        "pool": get_db_pool().stats(),
+        "replicas": router.stats() if router else None,
+        "prepared_statements": prepared_statements.stats(),
+        "compressed_body_cache": {"hits": compressed_body_cache.hits, "misses": compressed_body_cache.misses},
+        "write_batching": group_commit_writer.stats(),
+        "previews": preview_pipeline.stats(),
+    })
+
+
+@app.route("/admin/auth/cache", methods=["GET"])
+def auth_cache_stats():
+    """Return verified-token cache and revocation statistics."""
+    return jsonify(token_cache.stats())
+
+
+@app.route("/admin/admission", methods=["GET"])
+def admission_stats():
+    """Return rate limiting and write concurrency statistics."""
+    return jsonify(get_admission_controller().stats())
 
 
 @app.route("/admin/add", methods=["POST", "OPTIONS"])
@@ -153,20 +2749,15 @@ def add_admin():
     if not email or not name:
         return jsonify({"error": "Name and email are required"}), 400
     
-    # Check if email already exists
-    if any(u["email"] == email for u in users):
+    try:
+        new_admin = users.add({
+            "name": name,
+            "email": email,
+            "password": password,
+            "user_type": "admin"
+        })
+    except DuplicateKeyError:
         return jsonify({"error": "Email already exists"}), 400
-    
-    new_id = max([u["user_id"] for u in users], default=0) + 1
-    new_admin = {
-        "user_id": new_id,
-        "name": name,
-        "email": email,
-        "password": password,
-        "user_type": "admin"
-    }
-    
-    users.append(new_admin)
     return jsonify({"message": "Admin added successfully", "admin": new_admin})
 
 
@@ -181,27 +2772,22 @@ def add_mayor():
     if not name or not email:
         return jsonify({"error": "Name and email are required"}), 400
     
-    # Check if email already exists
-    if any(u["email"] == email for u in users):
+    try:
+        new_mayor = users.add({
+            "name": name,
+            "email": email,
+            "password": password,
+            "user_type": "mayor"
+        })
+    except DuplicateKeyError:
         return jsonify({"error": "Email already exists"}), 400
-    
-    new_id = max([u["user_id"] for u in users], default=0) + 1
-    new_mayor = {
-        "user_id": new_id,
-        "name": name,
-        "email": email,
-        "password": password,
-        "user_type": "mayor"
-    }
-    
-    users.append(new_mayor)
     return jsonify({"message": "Mayor added successfully", "mayor": new_mayor})
 
 
 @app.route("/admins", methods=["GET"])
 def get_admins():
     """List all admin users."""
-    admins = [u for u in users if u["user_type"] == "admin"]
+    admins = users.filter_by("user_type", "admin")
     return jsonify({"admins": admins})
 
 
@@ -215,33 +2801,11 @@ def mayor_dashboard():
         return jsonify({"status": "ok"}), 200
     """Get mayor dashboard statistics."""
     try:
-        conn = get_db_connection()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        
-        # Get application statistics
-        cur.execute("SELECT status, COUNT(*) as count FROM application GROUP BY status")
-        app_stats = cur.fetchall()
-        
-        # Get renewal statistics
-        cur.execute("SELECT status, COUNT(*) as count FROM renew GROUP BY status")
-        renewal_stats = cur.fetchall()
-        
-        cur.close()
-        conn.close()
-        
-        # Process statistics
-        stats = {
-            "total_new": sum(s['count'] for s in app_stats),
-            "approved_new": next((s['count'] for s in app_stats if s['status'] == 'approved'), 0),
-            "pending_new": next((s['count'] for s in app_stats if s['status'] == 'pending'), 0),
-            "rejected_new": next((s['count'] for s in app_stats if s['status'] == 'rejected'), 0),
-            "total_renewals": sum(s['count'] for s in renewal_stats),
-            "approved_renewals": next((s['count'] for s in renewal_stats if s['status'] == 'approved'), 0),
-            "pending_renewals": next((s['count'] for s in renewal_stats if s['status'] == 'pending'), 0),
-            "rejected_renewals": next((s['count'] for s in renewal_stats if s['status'] == 'rejected'), 0),
-        }
-        
-        return jsonify(stats)
+        # The listener invalidates the cache when another worker writes.
+        notification_listener.ensure_started()
+        stats = dashboard_stats_cache.get()
+        etag = make_etag(sorted(stats.items()))
+        return not_modified(etag) or with_etag(jsonify(stats), etag)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -249,13 +2813,33 @@ def mayor_dashboard():
 @app.route("/mayor/scholars", methods=["GET"])
 def view_scholars():
     """View all scholars."""
-    return jsonify({"scholars": students})
+    return jsonify({"scholars": students.all()})
 
 
 @app.route("/mayor/records", methods=["GET"])
 def scholar_records():
     """Get scholar records."""
-    return jsonify({"records": scholarship_records})
+    etag = make_etag(request.path, scholarship_records.version)
+    return not_modified(etag) or with_etag(jsonify({"records": scholarship_records.all()}), etag)
+
+
+@app.route("/mayor/records/export", methods=["GET"])
+def export_records():
+    """Download scholar records as CSV or XLSX (``?format=``)."""
+    try:
+        export_format = parse_export_format(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    etag = make_etag(request.full_path, scholarship_records.version)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    records = scholarship_records.all()
+    columns = list(dict.fromkeys(column for record in records for column in record))
+    rows = [tuple(record.get(column) for column in columns) for record in records]
+    filename = f"scholarship-records-{datetime.date.today().isoformat()}"
+    return with_etag(export_response(columns, [rows], export_format, filename), etag)
 
 
 # -----------------------------
@@ -265,13 +2849,14 @@ def scholar_records():
 @app.route('/students', methods=['GET'])
 def get_students():
     """Get all students."""
-    return jsonify({"students": students})
+    etag = make_etag(request.path, students.version)
+    return not_modified(etag) or with_etag(jsonify({"students": students.all()}), etag)
 
 
 @app.route('/student/<int:user_id>', methods=['GET'])
 def get_student_by_id(user_id):
     """Get specific student details."""
-    student = next((s for s in students if s["id"] == user_id), None)
+    student = students.get(user_id)
     
     if student:
         return jsonify({"student": student})
@@ -281,8 +2866,8 @@ def get_student_by_id(user_id):
 @app.route("/student/profile/<int:user_id>", methods=["GET"])
 def get_student_profile(user_id):
     """Get student profile."""
-    user = next((u for u in users if u["user_id"] == user_id), None)
-    student = next((s for s in students if s["id"] == user_id), None)
+    user = users.get(user_id)
+    student = students.get(user_id)
     
     if user:
         profile = {
@@ -310,19 +2895,15 @@ def get_user_by_email():
         return jsonify({"error": "Email is required"}), 400
     
     try:
-        conn = get_db_connection()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        cur.execute(
-            "SELECT first_name, middle_name, last_name FROM users WHERE email = %s",
-            (email,)
-        )
-        user = cur.fetchone()
-        cur.close()
-        conn.close()
-        
-        if user:
-            return jsonify(dict(user))
-        return jsonify({"error": "User not found"}), 404
+        with get_db_connection(readonly=True) as conn:
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+            prepared_statements.execute(cur, "user_by_email", (email,))
+            user = cur.fetchone()
+            cur.close()
+
+            if user:
+                return jsonify(dict(user))
+            return jsonify({"error": "User not found"}), 404
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -339,16 +2920,12 @@ def add_student():
     if not name or not email:
         return jsonify({"error": "Name and email are required"}), 400
     
-    new_id = max([s['id'] for s in students], default=0) + 1
-    new_student = {
-        "id": new_id,
+    new_student = students.add({
         "name": name,
         "email": email,
         "course": course,
         "year": year
-    }
-    
-    students.append(new_student)
+    })
     return jsonify({"message": "Student added successfully", "student": new_student})
 
 
@@ -367,25 +2944,27 @@ def apply_scholarship():
     
     if not user_id or not student_name:
         return jsonify({"error": "Student ID and name are required"}), 400
+
+    name_parts = student_name.split()
+    first_name = name_parts[0] if len(name_parts) > 0 else ''
+    last_name = name_parts[-1] if len(name_parts) > 1 else ''
+    values = (user_id, first_name, last_name, datetime.datetime.now().year, 'pending')
     
     try:
-        conn = get_db_connection()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        
-        name_parts = student_name.split()
-        first_name = name_parts[0] if len(name_parts) > 0 else ''
-        last_name = name_parts[-1] if len(name_parts) > 1 else ''
-        
-        cur.execute(
-            """INSERT INTO application (user_id, first_name, last_name, year_applied, status) 
-               VALUES (%s, %s, %s, %s, %s) RETURNING application_id""",
-            (user_id, first_name, last_name, datetime.datetime.now().year, 'pending')
-        )
-        app_id = cur.fetchone()['application_id']
-        conn.commit()
-        cur.close()
-        conn.close()
-        
+        if app.config["WRITE_BATCHING"]:
+            app_id = group_commit_writer.submit(
+                "application", values, app.config["WRITE_BATCH_TIMEOUT"]
+            )['application_id']
+        else:
+            with get_db_connection() as conn:
+                cur = conn.cursor(cursor_factory=RealDictCursor)
+                prepared_statements.execute(cur, "insert_application", values)
+                app_id = cur.fetchone()['application_id']
+                publish_event(cur, "application.created", application_id=app_id, user_id=user_id)
+                conn.commit()
+                cur.close()
+
+        dashboard_stats_cache.invalidate()
         return jsonify({"message": "Application submitted successfully", "application": {"app_id": app_id}})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -402,62 +2981,75 @@ def renew_scholarship():
     
     if not user_id or not student_name:
         return jsonify({"error": "Student ID and name are required"}), 400
+
+    name_parts = student_name.split()
+    first_name = name_parts[0] if len(name_parts) > 0 else ''
+    last_name = name_parts[-1] if len(name_parts) > 1 else ''
     
     try:
-        conn = get_db_connection()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        
-        name_parts = student_name.split()
-        first_name = name_parts[0] if len(name_parts) > 0 else ''
-        last_name = name_parts[-1] if len(name_parts) > 1 else ''
-        
-        cur.execute("SELECT application_id FROM application WHERE user_id = %s LIMIT 1", (user_id,))
-        app = cur.fetchone()
-        app_id = app['application_id'] if app else 1
-        
-        cur.execute(
-            """INSERT INTO renew (application_id, user_id, first_name, last_name, status) 
-               VALUES (%s, %s, %s, %s, %s) RETURNING renewal_id""",
-            (app_id, user_id, first_name, last_name, 'Pending')
-        )
-        renewal_id = cur.fetchone()['renewal_id']
-        conn.commit()
-        cur.close()
-        conn.close()
-        
+        if app.config["WRITE_BATCHING"]:
+            renewal_id = group_commit_writer.submit(
+                "renewal", (user_id, first_name, last_name, 'Pending'), app.config["WRITE_BATCH_TIMEOUT"]
+            )['renewal_id']
+        else:
+            with get_db_connection() as conn:
+                cur = conn.cursor(cursor_factory=RealDictCursor)
+
+                prepared_statements.execute(cur, "first_application_for_user", (user_id,))
+                application = cur.fetchone()
+                app_id = application['application_id'] if application else 1
+
+                prepared_statements.execute(
+                    cur, "insert_renewal", (app_id, user_id, first_name, last_name, 'Pending')
+                )
+                renewal_id = cur.fetchone()['renewal_id']
+                publish_event(cur, "renewal.created", renewal_id=renewal_id, application_id=app_id, user_id=user_id)
+                conn.commit()
+                cur.close()
+
+        dashboard_stats_cache.invalidate()
         return jsonify({"message": "Renewal application submitted successfully", "application": {"renewal_id": renewal_id}})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+def format_student_application(app):
+    return {
+        'app_id': app['application_id'],
+        'student_id': app['student_id'],
+        'student_name': app['student_name'],
+        'status': app['status'],
+        'date': app['date'] or ''  # a date, encoded as YYYY-MM-DD
+    }
+
+
 @app.route("/applications/student/<int:student_id>", methods=["GET", "OPTIONS"])
 def get_student_applications(student_id):
     if request.method == "OPTIONS":
         return jsonify({"status": "ok"}), 200
-    """Get applications for a specific student."""
+    """Get applications for a specific student.
+
+    Pass ``stream=true`` to stream the list from a server-side cursor.
+    """
     try:
-        conn = get_db_connection()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        cur.execute(
-            """SELECT application_id, user_id as student_id, 
-               CONCAT(first_name, ' ', last_name) as student_name, 
-               status, submission_date as date 
-               FROM application WHERE user_id = %s""",
-            (student_id,)
-        )
-        apps = cur.fetchall()
-        cur.close()
-        conn.close()
-        
-        result = [{
-            'app_id': app['application_id'],
-            'student_id': app['student_id'],
-            'student_name': app['student_name'],
-            'status': app['status'],
-            'date': app['date'].strftime('%Y-%m-%d') if app['date'] else ''
-        } for app in apps]
-        
-        return jsonify({"applications": result})
+        stream = parse_bool(request.args.get('stream', 'false'))
+        with get_db_connection(readonly=True) as conn:
+            etag = table_etag(conn, "application")
+            cached = not_modified(etag)
+            if cached:
+                return cached
+            if stream:
+                return with_etag(stream_json_rows(
+                    "applications", STUDENT_APPLICATIONS_SQL, (student_id,), format_student_application,
+                    conn=conn.detach()
+                ), etag)
+
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+            prepared_statements.execute(cur, "student_applications", (student_id,))
+            apps = cur.fetchall()
+            cur.close()
+
+        return with_etag(jsonify({"applications": [format_student_application(app) for app in apps]}), etag)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -465,13 +3057,13 @@ def get_student_applications(student_id):
 @app.route("/applications", methods=["GET"])
 def get_all_applications():
     """Get all applications."""
-    return jsonify({"applications": applications})
+    return jsonify({"applications": applications.all()})
 
 
 @app.route("/applications/pending", methods=["GET"])
 def get_pending():
     """Get pending applications."""
-    pending = [a for a in applications if a["status"] == "Pending"]
+    pending = applications.filter_by("status", "Pending")
     return jsonify({"pending_applications": pending})
 
 
@@ -479,33 +3071,35 @@ def get_pending():
 def update_application_status(app_id):
     if request.method == "OPTIONS":
         return jsonify({"status": "ok"}), 200
-    """Update application status."""
+    """Update application status. ``?fields=`` narrows the returned application."""
     data = request.get_json()
     new_status = data.get("status")
     
     if not new_status:
         return jsonify({"error": "Status is required"}), 400
+
+    try:
+        fields = parse_fields(request.args, APPLICATION_FIELDS, required=("application_id",))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
     try:
-        conn = get_db_connection()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        
-        cur.execute(
-            "UPDATE application SET status = %s WHERE application_id = %s RETURNING *",
-            (new_status.lower(), app_id)
-        )
-        updated_app = cur.fetchone()
-        
-        if not updated_app:
+        with get_db_connection() as conn:
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+
+            execute_returning(cur, "update_application_status", (new_status.lower(), app_id), fields)
+            updated_app = cur.fetchone()
+
+            if not updated_app:
+                cur.close()
+                return jsonify({"error": "Application not found"}), 404
+
+            publish_event(cur, "application.status", application_ids=[app_id], status=new_status.lower())
+            conn.commit()
             cur.close()
-            conn.close()
-            return jsonify({"error": "Application not found"}), 404
-        
-        conn.commit()
-        cur.close()
-        conn.close()
-        
-        return jsonify({"message": "Application status updated", "application": dict(updated_app)})
+
+            dashboard_stats_cache.invalidate()
+            return jsonify({"message": "Application status updated", "application": dict(updated_app)})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -530,24 +3124,221 @@ def reject_application(app_id):
     return update_application_status(app_id)
 
 
+@app.route("/mayor/applications/bulk-status", methods=["POST", "OPTIONS"])
+def bulk_update_status():
+    if request.method == "OPTIONS":
+        return jsonify({"status": "ok"}), 200
+    """Approve or reject many applications and renewals in one transaction.
+
+    Body: {"status": "approved", "application_ids": [...], "renewal_ids": [...]}.
+    Responds with the outcome ("updated" or "not_found") for every requested ID.
+    """
+    data = request.get_json() or {}
+    new_status = (data.get("status") or "").lower()
+    application_ids = data.get("application_ids") or []
+    renewal_ids = data.get("renewal_ids") or []
+
+    if new_status not in ("approved", "rejected", "pending"):
+        return jsonify({"error": "Status must be approved, rejected or pending"}), 400
+    if not isinstance(application_ids, list) or not isinstance(renewal_ids, list):
+        return jsonify({"error": "application_ids and renewal_ids must be lists"}), 400
+    if not application_ids and not renewal_ids:
+        return jsonify({"error": "No IDs given"}), 400
+    if len(application_ids) + len(renewal_ids) > app.config["BULK_STATUS_MAX"]:
+        return jsonify({"error": f"At most {app.config['BULK_STATUS_MAX']} IDs per request"}), 400
+    try:
+        application_ids = sorted({int(i) for i in application_ids})
+        renewal_ids = sorted({int(i) for i in renewal_ids})
+    except (TypeError, ValueError):
+        return jsonify({"error": "IDs must be integers"}), 400
+
+    try:
+        with get_db_connection() as conn:
+            cur = conn.cursor()
+            updated_apps = set()
+            updated_renewals = set()
+
+            if application_ids:
+                cur.execute(
+                    "UPDATE application SET status = %s WHERE application_id = ANY(%s) RETURNING application_id",
+                    (new_status, application_ids)
+                )
+                updated_apps = {row[0] for row in cur.fetchall()}
+            # renew keeps the capitalized statuses ('Approved') the mobile app writes and compares.
+            renewal_status = new_status.capitalize()
+            if renewal_ids:
+                cur.execute(
+                    "UPDATE renew SET status = %s WHERE renewal_id = ANY(%s) RETURNING renewal_id",
+                    (renewal_status, renewal_ids)
+                )
+                updated_renewals = {row[0] for row in cur.fetchall()}
+
+            # NOTIFY payloads are capped at 8000 bytes, so large batches go out in chunks.
+            for start in range(0, len(application_ids), 500):
+                chunk = [i for i in application_ids[start:start + 500] if i in updated_apps]
+                if chunk:
+                    publish_event(cur, "application.status", application_ids=chunk, status=new_status)
+            for start in range(0, len(renewal_ids), 500):
+                chunk = [i for i in renewal_ids[start:start + 500] if i in updated_renewals]
+                if chunk:
+                    publish_event(cur, "renewal.status", renewal_ids=chunk, status=renewal_status)
+            conn.commit()
+            cur.close()
+
+        dashboard_stats_cache.invalidate()
+        return jsonify({
+            "message": "Statuses updated",
+            "status": new_status,
+            "updated": len(updated_apps) + len(updated_renewals),
+            "applications": {str(i): "updated" if i in updated_apps else "not_found" for i in application_ids},
+            "renewals": {str(i): "updated" if i in updated_renewals else "not_found" for i in renewal_ids},
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route("/mayor/applications", methods=["GET", "OPTIONS"])
 def get_mayor_applications():
     if request.method == "OPTIONS":
         return jsonify({"status": "ok"}), 200
-    """Get all applications for mayor view."""
+    """Get a page of applications for mayor view, newest first.
+
+    Query parameters: limit, cursor (from a previous next_cursor), fields
+    (a subset of APPLICATION_FIELDS; application_id and submission_date are
+    always included for the cursor) and the filters accepted by
+    build_application_filters. With ``stream=true`` every matching row is
+    streamed instead and limit/cursor are ignored.
+    """
     try:
-        conn = get_db_connection()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        cur.execute(
-            """SELECT application_id, user_id, first_name, middle_name, last_name, 
-               student_id, course, year_level, gwa, status, submission_date 
-               FROM application ORDER BY submission_date DESC"""
-        )
-        apps = cur.fetchall()
-        cur.close()
-        conn.close()
-        
-        return jsonify({"applications": [dict(app) for app in apps]})
+        fields = parse_fields(request.args, APPLICATION_FIELDS, default=MAYOR_APPLICATION_FIELDS,
+                              required=("application_id", "submission_date"))
+        clauses, values = build_application_filters(request.args)
+        stream = parse_bool(request.args.get('stream', 'false'))
+        limit = parse_page_size(request.args)
+        if request.args.get('cursor') and not stream:
+            clauses.append("(submission_date, application_id) < (%s, %s)")
+            values.extend(decode_cursor(request.args['cursor'], APPLICATION_CURSOR))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    query = mayor_applications_query(clauses, fields)
+
+    try:
+        with get_db_connection(readonly=True) as conn:
+            etag = table_etag(conn, "application")
+            cached = not_modified(etag)
+            if cached:
+                return cached
+            if stream:
+                return with_etag(stream_json_rows("applications", query, values, conn=conn.detach()), etag)
+
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+            cur.execute(query + " LIMIT %s", values + [limit + 1])
+            apps = cur.fetchall()
+            cur.close()
+
+        next_cursor = None
+        if len(apps) > limit:
+            apps = apps[:limit]
+            last = apps[-1]
+            next_cursor = encode_cursor(last['submission_date'], last['application_id'])
+
+        return with_etag(jsonify({"applications": [dict(app) for app in apps], "next_cursor": next_cursor}), etag)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/mayor/scholar-records", methods=["GET", "OPTIONS"])
+def get_scholar_records():
+    if request.method == "OPTIONS":
+        return jsonify({"status": "ok"}), 200
+    """Get applications and renewals as one list, newest first.
+
+    Each row carries record_type ("application" or "renewal"), record_id
+    and the RECORD_FIELDS columns, with statuses lowercased. Query
+    parameters: type (one record type; both by default), archived (default
+    false), status, course, baranggay, fields, limit and cursor (from a
+    previous next_cursor). With ``stream=true`` every matching row is
+    streamed instead and limit/cursor are ignored.
+    """
+    try:
+        record_types = parse_record_types(request.args)
+        fields = parse_fields(request.args, RECORD_FIELDS, default=RECORD_FIELDS, required=("submission_date",))
+        filters = build_record_filters(request.args)
+        stream = parse_bool(request.args.get('stream', 'false'))
+        limit = parse_page_size(request.args)
+        cursor = None
+        if request.args.get('cursor') and not stream:
+            cursor = decode_cursor(request.args['cursor'], RECORD_CURSOR)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        with get_db_connection(readonly=True) as conn:
+            etag = table_etag(conn, "application", "renew")
+            cached = not_modified(etag)
+            if cached:
+                return cached
+            if stream:
+                query, params = scholar_records_query(record_types, fields, filters)
+                return with_etag(stream_json_rows("records", query, params, conn=conn.detach()), etag)
+
+            query, params = scholar_records_query(record_types, fields, filters, cursor=cursor, limit=limit + 1)
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+            cur.execute(query, params)
+            records = cur.fetchall()
+            cur.close()
+
+        next_cursor = None
+        if len(records) > limit:
+            records = records[:limit]
+            last = records[-1]
+            next_cursor = encode_cursor(last['submission_date'], last['record_type'], last['record_id'])
+
+        return with_etag(jsonify({"records": [dict(record) for record in records], "next_cursor": next_cursor}), etag)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/mayor/scholar-records/export", methods=["GET", "OPTIONS"])
+def export_scholar_records():
+    if request.method == "OPTIONS":
+        return jsonify({"status": "ok"}), 200
+    """Download applications and/or renewals as CSV or XLSX.
+
+    Takes the type, status, course, baranggay and fields parameters of
+    /mayor/scholar-records, plus format (csv, the default, or xlsx).
+    Archived rows are included unless ``archived`` is given. With a single
+    type every column of that table can be exported and is by default.
+    Rows stream from a server-side cursor per record type, applications
+    first, each newest first; merging the two by date would sort the
+    whole export before the first row could be sent.
+    """
+    try:
+        record_types = parse_record_types(request.args)
+        if record_types == ["application"]:
+            allowed = APPLICATION_FIELDS
+        elif record_types == ["renewal"]:
+            allowed = RENEWAL_FIELDS
+        else:
+            allowed = RECORD_FIELDS
+        fields = parse_fields(request.args, allowed, default=allowed, required=("submission_date",))
+        filters = build_record_filters(request.args, archived_default=None)
+        export_format = parse_export_format(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    name = record_types[0] + "s" if len(record_types) == 1 else "scholar-records"
+    filename = f"{name}-{datetime.date.today().isoformat()}"
+    queries = [scholar_records_query([record_type], fields, filters) for record_type in record_types]
+
+    try:
+        with get_db_connection(readonly=True) as conn:
+            etag = table_etag(conn, "application", "renew")
+            cached = not_modified(etag)
+            if cached:
+                return cached
+            return with_etag(stream_export(queries, export_format, filename, conn.detach()), etag)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -556,27 +3347,29 @@ def get_mayor_applications():
 def archive_application(app_id):
     if request.method == "OPTIONS":
         return jsonify({"status": "ok"}), 200
-    """Archive an application."""
+    """Archive an application. ``?fields=`` narrows the returned application."""
     try:
-        conn = get_db_connection()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        
-        cur.execute(
-            "UPDATE application SET archived = TRUE WHERE application_id = %s RETURNING *",
-            (app_id,)
-        )
-        updated_app = cur.fetchone()
-        
-        if not updated_app:
+        fields = parse_fields(request.args, APPLICATION_FIELDS, required=("application_id",))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        with get_db_connection() as conn:
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+
+            execute_returning(cur, "archive_application", (app_id,), fields)
+            updated_app = cur.fetchone()
+
+            if not updated_app:
+                cur.close()
+                return jsonify({"error": "Application not found"}), 404
+
+            publish_event(cur, "application.archived", application_id=app_id)
+            conn.commit()
             cur.close()
-            conn.close()
-            return jsonify({"error": "Application not found"}), 404
-        
-        conn.commit()
-        cur.close()
-        conn.close()
-        
-        return jsonify({"message": "Application archived", "application": dict(updated_app)})
+
+            dashboard_stats_cache.invalidate()
+            return jsonify({"message": "Application archived", "application": dict(updated_app)})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -585,27 +3378,91 @@ def archive_application(app_id):
 def archive_renewal(renewal_id):
     if request.method == "OPTIONS":
         return jsonify({"status": "ok"}), 200
-    """Archive a renewal."""
+    """Archive a renewal. ``?fields=`` narrows the returned renewal."""
     try:
-        conn = get_db_connection()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        
-        cur.execute(
-            "UPDATE renew SET archived = TRUE WHERE renewal_id = %s RETURNING *",
-            (renewal_id,)
-        )
-        updated_renewal = cur.fetchone()
-        
-        if not updated_renewal:
+        fields = parse_fields(request.args, RENEWAL_FIELDS, required=("renewal_id",))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        with get_db_connection() as conn:
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+
+            execute_returning(cur, "archive_renewal", (renewal_id,), fields)
+            updated_renewal = cur.fetchone()
+
+            if not updated_renewal:
+                cur.close()
+                return jsonify({"error": "Renewal not found"}), 404
+
+            publish_event(cur, "renewal.archived", renewal_id=renewal_id)
+            conn.commit()
             cur.close()
-            conn.close()
-            return jsonify({"error": "Renewal not found"}), 404
-        
-        conn.commit()
-        cur.close()
-        conn.close()
-        
-        return jsonify({"message": "Renewal archived", "renewal": dict(updated_renewal)})
+
+            dashboard_stats_cache.invalidate()
+            return jsonify({"message": "Renewal archived", "renewal": dict(updated_renewal)})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+# -----------------------------
+# Search Routes
+# -----------------------------
+
+@app.route("/search", methods=["GET", "OPTIONS"])
+def search_applicants():
+    if request.method == "OPTIONS":
+        return jsonify({"status": "ok"}), 200
+    """Ranked search over applications and renewals, best match first.
+
+    Matches every word of ``q`` as a prefix of the name, student ID,
+    baranggay or school. Other query parameters: type (application or
+    renewal; both by default), status, archived (default false), limit and
+    cursor (from a previous next_cursor).
+    """
+    try:
+        search_terms = parse_search_terms(request.args.get('q'))
+        record_types = parse_record_types(request.args)
+
+        clauses = ["archived = %s"]
+        filter_values = [parse_bool(request.args.get('archived', 'false'))]
+        if request.args.get('status'):
+            # Renewal statuses are capitalized ('Pending'), application statuses are not.
+            clauses.append("LOWER(status) = %s")
+            filter_values.append(request.args['status'].lower())
+
+        limit = parse_page_size(request.args)
+        cursor = decode_cursor(request.args['cursor'], SEARCH_CURSOR) if request.args.get('cursor') else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    values = []
+    for _ in record_types:
+        values.extend([search_terms] + filter_values)
+    if cursor:
+        values.extend(cursor)
+    values.append(limit + 1)
+    query = applicant_search_query(record_types, clauses, after_cursor=cursor is not None)
+
+    try:
+        with get_db_connection(readonly=True) as conn:
+            etag = table_etag(conn, "application", "renew")
+            cached = not_modified(etag)
+            if cached:
+                return cached
+
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+            cur.execute(query, values)
+            results = cur.fetchall()
+            cur.close()
+
+        next_cursor = None
+        if len(results) > limit:
+            results = results[:limit]
+            last = results[-1]
+            next_cursor = encode_cursor(last['score'], last['record_type'], last['record_id'])
+
+        return with_etag(jsonify({"results": [dict(row) for row in results], "next_cursor": next_cursor}), etag)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -618,17 +3475,10 @@ def archive_renewal(renewal_id):
 def get_renewal_status():
     if request.method == "OPTIONS":
         return jsonify({"status": "ok"}), 200
-    """Get renewal open/closed status."""
+    """Get renewal open/closed status (served from memory, refreshed via NOTIFY)."""
     try:
-        conn = get_db_connection()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        cur.execute("SELECT is_open FROM renewal_settings WHERE id = 1")
-        result = cur.fetchone()
-        cur.close()
-        conn.close()
-        
-        is_open = result['is_open'] if result else False
-        return jsonify({"is_open": is_open})
+        notification_listener.ensure_started()
+        return jsonify({"is_open": renewal_status_cache.get()})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -645,22 +3495,27 @@ def update_renewal_status():
         return jsonify({"error": "is_open field is required"}), 400
     
     try:
-        conn = get_db_connection()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        
-        cur.execute(
-            """INSERT INTO renewal_settings (id, is_open, updated_at) 
-               VALUES (1, %s, NOW()) 
-               ON CONFLICT (id) DO UPDATE SET is_open = %s, updated_at = NOW()
-               RETURNING *""",
-            (is_open, is_open)
-        )
-        result = cur.fetchone()
-        conn.commit()
-        cur.close()
-        conn.close()
-        
-        return jsonify({"message": "Renewal status updated", "is_open": result['is_open']})
+        with get_db_connection() as conn:
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+
+            cur.execute(
+                """INSERT INTO renewal_settings (id, is_open, updated_at) 
+                   VALUES (1, %s, NOW()) 
+                   ON CONFLICT (id) DO UPDATE SET is_open = %s, updated_at = NOW()
+                   RETURNING *""",
+                (is_open, is_open)
+            )
+            result = cur.fetchone()
+            # Delivered to every worker's listener when the transaction commits.
+            cur.execute(
+                "SELECT pg_notify(%s, %s)",
+                (RENEWAL_SETTINGS_CHANNEL, json.dumps({"is_open": result['is_open']}))
+            )
+            conn.commit()
+            cur.close()
+
+            renewal_status_cache.invalidate()
+            return jsonify({"message": "Renewal status updated", "is_open": result['is_open']})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -669,67 +3524,590 @@ def update_renewal_status():
 def update_renewal(renewal_id):
     if request.method == "OPTIONS":
         return jsonify({"status": "ok"}), 200
-    """Update renewal application."""
+    """Update renewal application. ``?fields=`` narrows the returned renewal."""
     data = request.get_json()
+
+    try:
+        fields = parse_fields(request.args, RENEWAL_FIELDS, default=RENEWAL_FIELDS, required=("renewal_id",))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
     try:
-        conn = get_db_connection()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        
-        # Build update query dynamically based on provided fields
-        update_fields = []
-        values = []
-        
-        if 'student_id' in data:
-            update_fields.append('student_id = %s')
-            values.append(data['student_id'])
-        if 'course' in data:
-            update_fields.append('course = %s')
-            values.append(data['course'])
-        if 'year_level' in data:
-            update_fields.append('year_level = %s')
-            values.append(data['year_level'])
-        if 'gwa' in data:
-            update_fields.append('gwa = %s')
-            values.append(data['gwa'])
-        if 'school_id_path' in data:
-            update_fields.append('school_id_path = %s')
-            values.append(data['school_id_path'])
-        if 'id_picture_path' in data:
-            update_fields.append('id_picture_path = %s')
-            values.append(data['id_picture_path'])
-        if 'birth_certificate_path' in data:
-            update_fields.append('birth_certificate_path = %s')
-            values.append(data['birth_certificate_path'])
-        if 'grades_path' in data:
-            update_fields.append('grades_path = %s')
-            values.append(data['grades_path'])
-        if 'cor_path' in data:
-            update_fields.append('cor_path = %s')
-            values.append(data['cor_path'])
-        
-        if not update_fields:
-            return jsonify({"error": "No fields to update"}), 400
-        
-        values.append(renewal_id)
-        query = f"UPDATE renew SET {', '.join(update_fields)} WHERE renewal_id = %s RETURNING *"
-        
-        cur.execute(query, values)
-        updated_renewal = cur.fetchone()
-        
-        if not updated_renewal:
+        with get_db_connection() as conn:
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+
+            # Build update query dynamically based on provided fields
+            update_fields = []
+            values = []
+
+            if 'student_id' in data:
+                update_fields.append('student_id = %s')
+                values.append(data['student_id'])
+            if 'course' in data:
+                update_fields.append('course = %s')
+                values.append(data['course'])
+            if 'year_level' in data:
+                update_fields.append('year_level = %s')
+                values.append(data['year_level'])
+            if 'gwa' in data:
+                update_fields.append('gwa = %s')
+                values.append(data['gwa'])
+            if 'school_id_path' in data:
+                update_fields.append('school_id_path = %s')
+                values.append(data['school_id_path'])
+            if 'id_picture_path' in data:
+                update_fields.append('id_picture_path = %s')
+                values.append(data['id_picture_path'])
+            if 'birth_certificate_path' in data:
+                update_fields.append('birth_certificate_path = %s')
+                values.append(data['birth_certificate_path'])
+            if 'grades_path' in data:
+                update_fields.append('grades_path = %s')
+                values.append(data['grades_path'])
+            if 'cor_path' in data:
+                update_fields.append('cor_path = %s')
+                values.append(data['cor_path'])
+
+            if not update_fields:
+                return jsonify({"error": "No fields to update"}), 400
+
+            values.append(renewal_id)
+            query = f"UPDATE renew SET {', '.join(update_fields)} WHERE renewal_id = %s RETURNING {column_list(fields)}"
+
+            cur.execute(query, values)
+            updated_renewal = cur.fetchone()
+
+            if not updated_renewal:
+                cur.close()
+                return jsonify({"error": "Renewal not found"}), 404
+
+            conn.commit()
             cur.close()
-            conn.close()
-            return jsonify({"error": "Renewal not found"}), 404
-        
-        conn.commit()
-        cur.close()
-        conn.close()
-        
-        return jsonify({"message": "Renewal updated successfully", "renewal": dict(updated_renewal)})
+
+            return jsonify({"message": "Renewal updated successfully", "renewal": dict(updated_renewal)})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+# -----------------------------
+# Document Routes
+# -----------------------------
+
+@app.route("/application/<int:record_id>/documents/<doc_type>", methods=["POST", "OPTIONS"],
+           defaults={"record_type": "application"})
+@app.route("/renewal/<int:record_id>/documents/<doc_type>", methods=["POST", "OPTIONS"],
+           defaults={"record_type": "renewal"})
+def upload_document(record_type, record_id, doc_type):
+    if request.method == "OPTIONS":
+        return jsonify({"status": "ok"}), 200
+    """Upload a PDF, PNG or JPEG as multipart/form-data field ``file``.
+
+    The document is streamed to the local store, deduplicated by SHA-256,
+    and its /documents/ URL written to the matching *_path column.
+    """
+    column = DOCUMENT_COLUMNS.get(doc_type)
+    if column is None:
+        return jsonify({"error": f"Document type must be one of: {', '.join(DOCUMENT_COLUMNS)}"}), 400
+    boundary = request.mimetype_params.get("boundary")
+    if request.mimetype != "multipart/form-data" or not boundary:
+        return jsonify({"error": "Expected a multipart/form-data body"}), 400
+    max_bytes = app.config["DOCUMENT_MAX_BYTES"]
+    if request.content_length and request.content_length > max_bytes + 64 * 1024:
+        return jsonify({"error": f"Documents are limited to {max_bytes} bytes"}), 413
+
+    # The upload is stored before touching the database, so slow clients never hold a connection.
+    try:
+        chunks = iter_multipart_file(request.stream, boundary, "file", app.config["DOCUMENT_CHUNK_SIZE"])
+        document = get_document_store().save(chunks, max_bytes)
+    except DocumentTooLarge as e:
+        return jsonify({"error": str(e)}), 413
+    except RequestEntityTooLarge:
+        return jsonify({"error": "Multipart body has too many or too large parts"}), 413
+    except UnsupportedDocumentType as e:
+        return jsonify({"error": str(e)}), 415
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    url = f"/documents/{document['name']}"
+    table, id_column = ("application", "application_id") if record_type == "application" else ("renew", "renewal_id")
+    try:
+        with get_db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(f"UPDATE {table} SET {column} = %s WHERE {id_column} = %s RETURNING {id_column}",
+                        (url, record_id))
+            if cur.fetchone() is None:
+                cur.close()
+                return jsonify({"error": f"{record_type.capitalize()} not found"}), 404
+            publish_event(cur, f"{record_type}.document", **{id_column: record_id, "document": doc_type})
+            conn.commit()
+            cur.close()
+
+        try:
+            preview_pipeline.schedule(document["name"])
+        except Exception as e:  # previews are rendered on demand if this fails
+            app.logger.warning("Could not schedule previews for %s: %s", document["name"], e)
+
+        return jsonify({"message": "Document uploaded", "document": {
+            "type": doc_type,
+            "path": url,
+            "sha256": document["sha256"],
+            "size": document["size"],
+            "content_type": document["content_type"],
+            "deduplicated": document["deduplicated"],
+        }})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/documents/<name>", methods=["GET", "HEAD"])
+def get_document(name):
+    """Serve a stored document by its content-addressed name.
+
+    See send_stored_file; with send_file the server's sendfile support
+    applies. Either way the bytes never pass through Python.
+    """
+    match = DOCUMENT_NAME_RE.match(name)
+    if not match:
+        return jsonify({"error": "Document not found"}), 404
+    path = get_document_store().path_for(name)
+    if not os.path.isfile(path):
+        return jsonify({"error": "Document not found"}), 404
+
+    # The hash is the content, so it doubles as a strong ETag.
+    return send_stored_file(path, DOCUMENT_CONTENT_TYPES[match.group(1)], name.split(".")[0])
+
+
+@app.route("/documents/<name>/<variant>", methods=["GET", "HEAD"])
+def get_document_preview(name, variant):
+    """Serve a downscaled JPEG of a stored document (the first page for PDFs).
+
+    ``variant`` is a key of PREVIEW_VARIANTS. Derivatives are usually made
+    in the background right after upload; a missing one is rendered on
+    this request.
+    """
+    if not DOCUMENT_NAME_RE.match(name) or variant not in app.config["PREVIEW_VARIANTS"]:
+        return jsonify({"error": "Document not found"}), 404
+    if not os.path.isfile(get_document_store().path_for(name)):
+        return jsonify({"error": "Document not found"}), 404
+    if not preview_supported(name):
+        return jsonify({"error": "Previews are not available for this document type on this server"}), 501
+
+    try:
+        path = preview_pipeline.get(name, variant, app.config["PREVIEW_TIMEOUT"])
+    except TimeoutError:
+        response = jsonify({"error": "Preview is still being generated"})
+        response.status_code = 503
+        response.headers["Retry-After"] = "1"
+        return response
+    except Exception as e:
+        return jsonify({"error": f"Could not render a preview: {e}"}), 422
+
+    return send_stored_file(path, "image/jpeg", f"{name.split('.')[0]}-{variant}")
+
+
+def send_stored_file(path, content_type, etag):
+    """Send a file from the document store without reading it into Python.
+
+    Goes out via X-Accel-Redirect when DOCUMENT_ACCEL_REDIRECT is set,
+    otherwise via send_file, which answers Range and conditional requests.
+    """
+    accel_prefix = app.config["DOCUMENT_ACCEL_REDIRECT"]
+    if accel_prefix:
+        response = Response(status=200, content_type=content_type)
+        relative = os.path.relpath(path, get_document_store().root).replace(os.sep, "/")
+        response.headers["X-Accel-Redirect"] = accel_prefix.rstrip("/") + "/" + relative
+    else:
+        response = send_file(path, mimetype=content_type, etag=etag, conditional=True,
+                             max_age=app.config["DOCUMENT_CACHE_MAX_AGE"])
+    # Applicant documents are personal; keep them out of shared caches.
+    response.headers["Cache-Control"] = f"private, max-age={app.config['DOCUMENT_CACHE_MAX_AGE']}, immutable"
+    return response
+
+
+# -----------------------------
+# Event Stream Routes
+# -----------------------------
+
+@app.route("/events", methods=["GET"])
+def events():
+    """Server-Sent Events feed of application and renewal changes.
+
+    All clients in a worker share the one LISTEN connection; an idle client
+    costs a queue and a heartbeat comment every EVENTS_HEARTBEAT seconds.
+    """
+    notification_listener.ensure_started()
+    subscription = event_broadcaster.subscribe()
+    heartbeat = app.config["EVENTS_HEARTBEAT"]
+
+    def generate():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    message = subscription.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if message is None:
+                    yield "event: resync\ndata: {}\n\n"
+                    return
+                yield message
+        finally:
+            event_broadcaster.unsubscribe(subscription)
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# -----------------------------
+# Bulk Import Routes
+# -----------------------------
+
+IMPORT_COLUMNS = (
+    "email", "first_name", "middle_name", "last_name", "contact_number", "student_id",
+    "address", "municipality", "baranggay", "school_name", "course", "year_level",
+    "gwa", "year_applied", "reason", "scholarship_type",
+)
+IMPORT_REQUIRED_COLUMNS = ("email", "first_name", "last_name")
+
+
+class ProgressReader:
+    """File-like wrapper that reports how many bytes COPY has consumed so far."""
+
+    def __init__(self, raw, callback=None):
+        self.raw = raw
+        self.callback = callback
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = self.raw.read(size)
+        self.bytes_read += len(chunk)
+        if self.callback and chunk:
+            self.callback(self.bytes_read)
+        return chunk
+
+
+def import_applicants(conn, stream, progress=None):
+    """Load an applicant CSV into users and application in one transaction.
+
+    The CSV is streamed into a temporary staging table with COPY, validated
+    and de-duplicated there, then inserted with two set-based statements.
+    Existing users are matched by email, ignoring case; rows are rejected for bad or
+    over-long values, emails or student IDs repeated within the file, an
+    existing application for the same year, or a student ID that already
+    has an application. Returns a summary with up to IMPORT_REJECTED_ROWS_MAX
+    rejected rows.
+    """
+    header_line = stream.readline()
+    if isinstance(header_line, bytes):
+        header_line = header_line.decode("utf-8-sig")
+    header = [name.strip().lower() for name in next(csv.reader([header_line]), [])]
+    unknown = [name for name in header if name not in IMPORT_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+    missing = [name for name in IMPORT_REQUIRED_COLUMNS if name not in header]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    cur.execute(
+        f"""CREATE TEMP TABLE applicant_import (
+               line_no BIGINT GENERATED ALWAYS AS IDENTITY (START WITH 2),
+               {', '.join(f'{name} TEXT' for name in IMPORT_COLUMNS)},
+               error TEXT
+           ) ON COMMIT DROP"""
+    )
+    cur.copy_expert(
+        f"COPY applicant_import ({', '.join(header)}) FROM STDIN WITH (FORMAT csv)",
+        ProgressReader(stream, progress),
+    )
+
+    # Normalize, then flag the first problem on each row.
+    cur.execute(
+        """UPDATE applicant_import SET
+               email = LOWER(TRIM(email)),
+               first_name = NULLIF(TRIM(first_name), ''),
+               last_name = NULLIF(TRIM(last_name), ''),
+               student_id = NULLIF(TRIM(student_id), ''),
+               gwa = NULLIF(TRIM(gwa), ''),
+               year_applied = COALESCE(NULLIF(TRIM(year_applied), ''), %s)""",
+        (str(datetime.datetime.now().year),)
+    )
+    # A value longer than users or application allows would abort the whole INSERT, so
+    # the limits are read from the catalog and checked per row.
+    cur.execute(
+        """SELECT column_name, MIN(character_maximum_length) AS max_length
+           FROM information_schema.columns
+           WHERE table_schema = current_schema() AND table_name IN ('users', 'application')
+             AND column_name = ANY(%s) AND character_maximum_length IS NOT NULL
+           GROUP BY column_name""",
+        (list(IMPORT_COLUMNS),)
+    )
+    max_lengths = {row['column_name']: row['max_length'] for row in cur.fetchall()}
+    length_checks = "".join(
+        f"\n               WHEN char_length({name}) > {max_lengths[name]} "
+        f"THEN '{name} is longer than {max_lengths[name]} characters'"
+        for name in IMPORT_COLUMNS if name in max_lengths
+    )
+    cur.execute(
+        r"""UPDATE applicant_import SET error = CASE
+               WHEN email IS NULL OR email !~ '^[^@[:space:]]+@[^@[:space:]]+$' THEN 'invalid email'
+               WHEN first_name IS NULL OR last_name IS NULL THEN 'first_name and last_name are required'
+               WHEN gwa IS NOT NULL AND gwa !~ '^[0-9](\.[0-9]{1,2})?$' THEN 'invalid gwa'
+               WHEN year_applied !~ '^[0-9]{4}$' THEN 'invalid year_applied'"""
+        + length_checks + """
+           END"""
+    )
+    cur.execute(
+        """UPDATE applicant_import s SET error = 'duplicate email in file'
+           FROM (SELECT email, MIN(line_no) AS first_line FROM applicant_import
+                 WHERE error IS NULL GROUP BY email) d
+           WHERE s.email = d.email AND s.line_no > d.first_line AND s.error IS NULL"""
+    )
+    cur.execute(
+        """UPDATE applicant_import s SET error = 'already applied for year_applied'
+           FROM users u JOIN application a ON a.user_id = u.user_id
+           WHERE LOWER(u.email) = s.email AND a.year_applied = s.year_applied::INT AND s.error IS NULL"""
+    )
+    # application.student_id is UNIQUE.
+    cur.execute(
+        """UPDATE applicant_import s SET error = 'duplicate student_id in file'
+           FROM (SELECT student_id, MIN(line_no) AS first_line FROM applicant_import
+                 WHERE error IS NULL AND student_id IS NOT NULL GROUP BY student_id) d
+           WHERE s.student_id = d.student_id AND s.line_no > d.first_line AND s.error IS NULL"""
+    )
+    cur.execute(
+        """UPDATE applicant_import s SET error = 'student_id already has an application'
+           FROM application a
+           WHERE a.student_id = s.student_id AND s.error IS NULL"""
+    )
+
+    cur.execute(
+        """INSERT INTO users (email, first_name, middle_name, last_name, contact_number, user_type)
+           SELECT email, first_name, middle_name, last_name, contact_number, 'student'
+           FROM applicant_import WHERE error IS NULL
+           ON CONFLICT ((LOWER(email))) DO NOTHING"""
+    )
+    users_created = cur.rowcount
+    cur.execute(
+        """INSERT INTO application (
+               user_id, student_id, first_name, middle_name, last_name, contact_number,
+               address, municipality, baranggay, school_name, course, year_level,
+               gwa, year_applied, reason, scholarship_type, status)
+           SELECT u.user_id, s.student_id, s.first_name, s.middle_name, s.last_name, s.contact_number,
+               s.address, s.municipality, s.baranggay, s.school_name, s.course, s.year_level,
+               s.gwa::DECIMAL(3,2), s.year_applied::INT, s.reason, s.scholarship_type, 'pending'
+           FROM applicant_import s JOIN users u ON LOWER(u.email) = s.email
+           WHERE s.error IS NULL
+           ORDER BY s.line_no"""
+    )
+    applications_created = cur.rowcount
+
+    cur.execute("SELECT COUNT(*) AS total, COUNT(error) AS rejected FROM applicant_import")
+    totals = cur.fetchone()
+    cur.execute(
+        """SELECT line_no AS line, email, error FROM applicant_import
+           WHERE error IS NOT NULL ORDER BY line_no LIMIT %s""",
+        (app.config["IMPORT_REJECTED_ROWS_MAX"],)
+    )
+    rejected_rows = [dict(row) for row in cur.fetchall()]
+    if applications_created:
+        publish_event(cur, "application.imported", count=applications_created)
+    conn.commit()
+    cur.close()
+
+    return {
+        "rows": totals['total'],
+        "users_created": users_created,
+        "applications_created": applications_created,
+        "rejected": totals['rejected'],
+        "rejected_rows": rejected_rows,
+    }
+
+
+@app.route("/admin/import/applicants", methods=["POST", "OPTIONS"])
+def import_applicants_route():
+    if request.method == "OPTIONS":
+        return jsonify({"status": "ok"}), 200
+    """Import applicants from a CSV upload (multipart field "file" or a text/csv body)."""
+    upload = request.files.get("file")
+    stream = upload.stream if upload else request.stream
+
+    try:
+        with get_db_connection() as conn:
+            summary = import_applicants(
+                conn, stream,
+                progress=lambda n: app.logger.debug("Applicant import: %d bytes loaded", n)
+            )
+        dashboard_stats_cache.invalidate()
+        return jsonify({"message": "Import finished", **summary})
+    except (ValueError, psycopg2.DataError) as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+# -----------------------------
+# Maintenance Commands
+# -----------------------------
+
+# Hot route queries with representative parameters; each must be answerable from an index.
+QUERY_PLAN_CHECKS = [
+    ("get_student_applications", STUDENT_APPLICATIONS_SQL, (1,)),
+    ("renew_scholarship lookup", FIRST_APPLICATION_FOR_USER_SQL, (1,)),
+    ("get_mayor_applications", mayor_applications_query([]) + " LIMIT %s", (51,)),
+    ("get_mayor_applications active",
+     mayor_applications_query(["archived = %s"]) + " LIMIT %s", (False, 51)),
+    ("get_mayor_applications pending",
+     mayor_applications_query(["status = %s", "archived = %s"]) + " LIMIT %s", ("pending", False, 51)),
+    ("get_mayor_applications next page",
+     mayor_applications_query(["(submission_date, application_id) < (%s, %s)"]) + " LIMIT %s",
+     (datetime.datetime(2030, 1, 1), 1000000, 51)),
+    ("renewals by user", "SELECT renewal_id FROM renew WHERE user_id = %s", (1,)),
+    ("active renewals",
+     "SELECT * FROM renew WHERE archived = %s ORDER BY submission_date DESC, renewal_id DESC LIMIT %s", (False, 51)),
+    ("update_application_status",
+     prepared_statements.statements["update_application_status"][0], ("approved", 1)),
+    ("archive_renewal", prepared_statements.statements["archive_renewal"][0], (1,)),
+    ("get_user_by_email", "SELECT first_name, middle_name, last_name FROM users WHERE email = %s", ("user1@gmail.com",)),
+    ("get_scholar_records active",
+     *scholar_records_query(list(RECORD_SOURCES), RECORD_FIELDS, {"archived": False}, limit=51)),
+    ("get_scholar_records next page",
+     *scholar_records_query(list(RECORD_SOURCES), RECORD_FIELDS, {"archived": False},
+                            cursor=(datetime.datetime(2030, 1, 1), "application", 1000000), limit=51)),
+    # Exports include archived rows, so they need the full submission_date indexes.
+    ("export_scholar_records application",
+     *scholar_records_query(["application"], APPLICATION_FIELDS, {})),
+    ("export_scholar_records renewal",
+     *scholar_records_query(["renewal"], RENEWAL_FIELDS, {})),
+    ("search_applicants",
+     applicant_search_query(list(SEARCH_SOURCES), ["archived = %s"]), ("juan:*", False, "juan:*", False, 51)),
+]
+
+
+def find_seq_scans(plan):
+    """Yield relation names of every Seq Scan node in an EXPLAIN (FORMAT JSON) plan tree."""
+    if plan.get("Node Type") == "Seq Scan":
+        yield plan.get("Relation Name")
+    for child in plan.get("Plans", []):
+        yield from find_seq_scans(child)
+
+
+@app.cli.command("check-query-plans")
+def check_query_plans():
+    """EXPLAIN each hot query and fail if any falls back to a sequential scan.
+
+    Run against a database seeded from database/usersdb.sql with the
+    migrations applied. Sequential scans are disabled for the session so a
+    small seed table still reports Seq Scan only when no usable index exists.
+    """
+    failures = 0
+    with get_db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SET enable_seqscan = off")
+        for name, query, params in QUERY_PLAN_CHECKS:
+            cur.execute("EXPLAIN (FORMAT JSON) " + query, params)
+            plan = cur.fetchone()[0][0]["Plan"]
+            scans = sorted(set(find_seq_scans(plan)))
+            if scans:
+                failures += 1
+                click.echo(f"FAIL {name}: sequential scan on {', '.join(scans)}")
+            else:
+                click.echo(f"ok   {name}")
+        cur.close()
+        conn.rollback()
+
+    if failures:
+        click.echo(f"{failures} of {len(QUERY_PLAN_CHECKS)} queries need an index")
+        sys.exit(1)
+
+
+@app.cli.command("compact-status-counts")
+def compact_status_counts_command():
+    """Fold pending status_count_deltas rows into status_counts.
+
+    The dashboard compacts whenever it reloads; schedule this (e.g. every
+    minute from cron) so the deltas stay small when nobody opens it.
+    """
+    with get_db_connection() as conn:
+        compact_status_counts(conn)
+
+
+@app.cli.command("import-applicants")
+@click.argument("csv_file", type=click.Path(exists=True, dir_okay=False))
+def import_applicants_command(csv_file):
+    """Import applicants from CSV_FILE into users and application."""
+    size = os.path.getsize(csv_file)
+    with open(csv_file, "rb") as f, get_db_connection() as conn:
+        with click.progressbar(length=size, label="Loading") as bar:
+            summary = import_applicants(conn, f, progress=lambda n: bar.update(n - bar.pos))
+
+    click.echo(
+        f"{summary['rows']} rows: {summary['applications_created']} applications, "
+        f"{summary['users_created']} new users, {summary['rejected']} rejected"
+    )
+    for row in summary["rejected_rows"]:
+        click.echo(f"  line {row['line']} ({row['email']}): {row['error']}")
+
+
+@app.cli.command("generate-previews")
+def generate_previews_command():
+    """Render missing previews for every document referenced by application and renew."""
+    columns = ", ".join(DOCUMENT_COLUMNS.values())
+    with get_db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"""SELECT DISTINCT path FROM (
+                SELECT unnest(ARRAY[{columns}]) AS path FROM application
+                UNION ALL
+                SELECT unnest(ARRAY[{columns}]) FROM renew
+            ) paths WHERE path LIKE '/documents/%%'""")
+        names = [row[0][len("/documents/"):] for row in cur.fetchall()]
+        cur.close()
+
+    names = [name for name in names if DOCUMENT_NAME_RE.match(name)
+             and os.path.isfile(get_document_store().path_for(name))]
+    skipped = [name for name in names if not preview_supported(name)]
+    futures = [future for name in names for future in preview_pipeline.schedule(name)]
+    with click.progressbar(concurrent.futures.as_completed(futures), length=len(futures),
+                           label=f"Rendering {len(futures)} derivatives of {len(names)} documents") as done:
+        for _ in done:
+            pass
+
+    stats = preview_pipeline.stats()
+    click.echo(f"{stats['generated']} rendered, {stats['failures']} failed, {stats['cache_hits']} already cached")
+    if skipped:
+        click.echo(f"{len(skipped)} documents skipped: install Pillow (and pypdfium2 for PDFs) to render them")
+
+
+@app.cli.command("bench-json")
+@click.option("--rows", default=10000, show_default=True, help="Rows per serialization.")
+@click.option("--repeat", default=5, show_default=True, help="Timed runs; the best is reported.")
+def bench_json(rows, repeat):
+    """Compare Flask's default JSON provider with the app's on application-shaped rows."""
+    now = datetime.datetime.now()
+    payload = {"applications": [{
+        "application_id": i,
+        "user_id": i,
+        "first_name": "Juan",
+        "middle_name": "Santos",
+        "last_name": "Dela Cruz",
+        "student_id": f"STU-{i}",
+        "course": "BS Information Technology",
+        "year_level": "2nd Year",
+        "gwa": decimal.Decimal("1.25"),
+        "status": "pending",
+        "submission_date": now - datetime.timedelta(minutes=i),
+    } for i in range(rows)]}
+
+    backend = "orjson" if orjson is not None else "stdlib json"
+    with app.app_context():
+        for name, provider in (("flask default", DefaultJSONProvider(app)), (f"app ({backend})", app.json)):
+            best = min(timeit.repeat(lambda: provider.response(payload), number=1, repeat=repeat))
+            click.echo(f"{name:>18}: {best * 1000:8.2f} ms per {rows} rows")
+
+
 if __name__ == "__main__":
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,45 @@
+-- Migration to index the columns the API filters and sorts on
+-- Verify afterwards with: flask --app app check-query-plans (from backend_app/)
+
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR(100) PRIMARY KEY,
+    applied_at TIMESTAMP DEFAULT NOW()
+);
+
+-- application WHERE user_id = %s (get_student_applications, renew_scholarship)
+CREATE INDEX IF NOT EXISTS idx_application_user_id
+    ON application (user_id);
+
+-- Keyset order of /mayor/applications
+CREATE INDEX IF NOT EXISTS idx_application_submitted
+    ON application (submission_date DESC, application_id DESC);
+
+-- Mayor screens only list active rows, usually narrowed to one status
+CREATE INDEX IF NOT EXISTS idx_application_active_submitted
+    ON application (submission_date DESC, application_id DESC)
+    WHERE archived = FALSE;
+
+CREATE INDEX IF NOT EXISTS idx_application_active_status_submitted
+    ON application (status, submission_date DESC, application_id DESC)
+    WHERE archived = FALSE;
+
+-- renew WHERE user_id = %s, and the FK used by ON DELETE CASCADE
+CREATE INDEX IF NOT EXISTS idx_renew_user_id
+    ON renew (user_id);
+
+CREATE INDEX IF NOT EXISTS idx_renew_application_id
+    ON renew (application_id);
+
+CREATE INDEX IF NOT EXISTS idx_renew_active_submitted
+    ON renew (submission_date DESC, renewal_id DESC)
+    WHERE archived = FALSE;
+
+CREATE INDEX IF NOT EXISTS idx_renew_active_status_submitted
+    ON renew (status, submission_date DESC, renewal_id DESC)
+    WHERE archived = FALSE;
+
+ANALYZE application;
+ANALYZE renew;
+
+INSERT INTO schema_migrations (version) VALUES ('20261018_add_query_indexes')
+ON CONFLICT (version) DO NOTHING;
@@ -0,0 +1,17 @@
+-- Migration to index the keyset order of renewal exports
+-- Exports include archived rows, so the partial idx_renew_active_* indexes
+-- from 20261018_add_query_indexes cannot serve them.
+-- Verify afterwards with: flask --app app check-query-plans (from backend_app/)
+
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR(100) PRIMARY KEY,
+    applied_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_renew_submitted
+    ON renew (submission_date DESC, renewal_id DESC);
+
+ANALYZE renew;
+
+INSERT INTO schema_migrations (version) VALUES ('20261018_add_renew_submitted_index')
+ON CONFLICT (version) DO NOTHING;
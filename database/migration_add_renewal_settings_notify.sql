@@ -0,0 +1,18 @@
+-- Migration to announce renewal_settings changes to the API workers
+-- Covers writes made outside the API (e.g. the mayor dashboard via Supabase).
+-- The payload matches what PUT /renewal/status sends, so Postgres folds the two into one notification.
+
+CREATE OR REPLACE FUNCTION notify_renewal_settings_changed() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify(
+        'renewal_settings_changed',
+        '{"is_open": ' || COALESCE(CASE WHEN NEW.is_open THEN 'true' ELSE 'false' END, 'null') || '}'
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS renewal_settings_notify ON renewal_settings;
+CREATE TRIGGER renewal_settings_notify
+AFTER INSERT OR UPDATE ON renewal_settings
+FOR EACH ROW EXECUTE FUNCTION notify_renewal_settings_changed();
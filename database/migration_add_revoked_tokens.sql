@@ -0,0 +1,20 @@
+-- Migration to share logged-out tokens between API workers
+-- /logout inserts the token's SHA-256 here and NOTIFYs token_revoked; every
+-- worker mirrors the table in memory and reloads it after reconnecting.
+-- Rows are only needed until the token would have expired anyway.
+
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR(100) PRIMARY KEY,
+    applied_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    token_hash CHAR(64) PRIMARY KEY,
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires_at
+    ON revoked_tokens (expires_at);
+
+INSERT INTO schema_migrations (version) VALUES ('20261018_add_revoked_tokens')
+ON CONFLICT (version) DO NOTHING;
@@ -0,0 +1,46 @@
+-- Migration to back GET /search with full-text indexes on application and renew
+-- Names rank highest, then student ID, then baranggay and school. The 'simple'
+-- configuration keeps names unstemmed, and punctuation is folded to spaces so
+-- IDs like STU-2021-0042 match on each part. The search_vector columns are
+-- internal; the API leaves them out of its responses.
+
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR(100) PRIMARY KEY,
+    applied_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE OR REPLACE FUNCTION applicant_search_vector(
+    first_name TEXT, middle_name TEXT, last_name TEXT,
+    student_id TEXT, baranggay TEXT, school_name TEXT
+) RETURNS tsvector AS $$
+    SELECT setweight(to_tsvector('simple'::regconfig, regexp_replace(
+               COALESCE(first_name, '') || ' ' || COALESCE(middle_name, '') || ' ' || COALESCE(last_name, ''),
+               '[^[:alnum:]]+', ' ', 'g')), 'A')
+        || setweight(to_tsvector('simple'::regconfig, regexp_replace(
+               COALESCE(student_id, ''), '[^[:alnum:]]+', ' ', 'g')), 'B')
+        || setweight(to_tsvector('simple'::regconfig, regexp_replace(
+               COALESCE(baranggay, '') || ' ' || COALESCE(school_name, ''), '[^[:alnum:]]+', ' ', 'g')), 'C')
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+-- Stored so ranking reads the vector instead of recomputing it for every match
+ALTER TABLE application ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        applicant_search_vector(first_name, middle_name, last_name, student_id, baranggay, school_name)
+    ) STORED;
+
+ALTER TABLE renew ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        applicant_search_vector(first_name, middle_name, last_name, student_id, baranggay, NULL)
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_application_search
+    ON application USING GIN (search_vector);
+
+CREATE INDEX IF NOT EXISTS idx_renew_search
+    ON renew USING GIN (search_vector);
+
+ANALYZE application;
+ANALYZE renew;
+
+INSERT INTO schema_migrations (version) VALUES ('20261018_add_search_index')
+ON CONFLICT (version) DO NOTHING;
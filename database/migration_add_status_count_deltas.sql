@@ -0,0 +1,96 @@
+-- Migration to record status_counts changes as per-statement delta rows
+-- Every write used to update two hot rows: its status_counts row and the
+-- table's table_versions row, so concurrent writers queued behind each
+-- other until commit. The triggers now only INSERT into
+-- status_count_deltas, which never conflicts. Readers add the deltas to
+-- status_counts, and compact_status_counts() folds them in periodically.
+--
+-- A table's ETag version is the number of delta rows it has ever written:
+-- status_counts.version holds the compacted ones, and every write statement
+-- adds at least one row. The version therefore moves on each commit, even
+-- when sequence IDs commit out of order.
+
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR(100) PRIMARY KEY,
+    applied_at TIMESTAMP DEFAULT NOW()
+);
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS status_count_deltas (
+    delta_id BIGSERIAL PRIMARY KEY,
+    table_name VARCHAR(20) NOT NULL,
+    status VARCHAR(50) NOT NULL,
+    delta BIGINT NOT NULL
+);
+
+ALTER TABLE status_counts ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0;
+
+-- Continue past the table_versions counters, so ETags issued before this
+-- migration cannot match a later state
+UPDATE status_counts c
+SET version = t.version + 1
+FROM table_versions t
+WHERE c.table_name = t.table_name
+  AND c.status = (SELECT MIN(status) FROM status_counts WHERE table_name = t.table_name);
+
+-- Updates record a row for every status involved, even when its count does
+-- not change, so edits that keep the status still move the version.
+CREATE OR REPLACE FUNCTION maintain_status_counts() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO status_count_deltas (table_name, status, delta)
+        SELECT TG_TABLE_NAME, status_key, COUNT(*)
+        FROM (SELECT LOWER(COALESCE(status, '')) AS status_key FROM new_rows) n
+        GROUP BY status_key;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO status_count_deltas (table_name, status, delta)
+        SELECT TG_TABLE_NAME, status_key, -COUNT(*)
+        FROM (SELECT LOWER(COALESCE(status, '')) AS status_key FROM old_rows) o
+        GROUP BY status_key;
+    ELSE
+        INSERT INTO status_count_deltas (table_name, status, delta)
+        SELECT TG_TABLE_NAME, status_key, SUM(delta)
+        FROM (SELECT LOWER(COALESCE(status, '')) AS status_key, 1 AS delta FROM new_rows
+              UNION ALL
+              SELECT LOWER(COALESCE(status, '')), -1 FROM old_rows) d
+        GROUP BY status_key;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Folds committed deltas into status_counts; deltas of open transactions stay put
+CREATE OR REPLACE FUNCTION compact_status_counts() RETURNS VOID AS $$
+    WITH moved AS (
+        DELETE FROM status_count_deltas RETURNING table_name, status, delta
+    )
+    INSERT INTO status_counts (table_name, status, count, version)
+    SELECT table_name, status, SUM(delta), COUNT(*)
+    FROM moved
+    GROUP BY table_name, status
+    ON CONFLICT (table_name, status) DO UPDATE
+    SET count = status_counts.count + EXCLUDED.count,
+        version = status_counts.version + EXCLUDED.version;
+$$ LANGUAGE sql;
+
+-- TRUNCATE locks out other writers to the table, so every delta is committed.
+-- Zero the counters instead of deleting them, so the version never goes back.
+CREATE OR REPLACE FUNCTION reset_status_counts() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM compact_status_counts();
+    UPDATE status_counts SET count = 0, version = version + 1 WHERE table_name = TG_TABLE_NAME;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS application_bump_version ON application;
+DROP TRIGGER IF EXISTS renew_bump_version ON renew;
+DROP FUNCTION IF EXISTS bump_table_version();
+DROP TABLE IF EXISTS table_versions;
+
+INSERT INTO schema_migrations (version) VALUES ('20261018_add_status_count_deltas')
+ON CONFLICT (version) DO NOTHING;
+
+COMMIT;
@@ -0,0 +1,86 @@
+-- Migration to maintain per-status counts for application and renew
+-- Lets /mayor/dashboard read a handful of rows instead of scanning both tables
+
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR(100) PRIMARY KEY,
+    applied_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS status_counts (
+    table_name VARCHAR(20) NOT NULL,
+    status VARCHAR(50) NOT NULL,
+    count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (table_name, status)
+);
+
+-- Statuses are stored lowercased so 'Pending' renewals and 'pending' applications count alike
+CREATE OR REPLACE FUNCTION maintain_status_counts() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE status_counts
+        SET count = count - 1
+        WHERE table_name = TG_TABLE_NAME AND status = LOWER(COALESCE(OLD.status, ''));
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO status_counts (table_name, status, count)
+        VALUES (TG_TABLE_NAME, LOWER(COALESCE(NEW.status, '')), 1)
+        ON CONFLICT (table_name, status) DO UPDATE SET count = status_counts.count + 1;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS application_status_counts_ins_del ON application;
+CREATE TRIGGER application_status_counts_ins_del
+AFTER INSERT OR DELETE ON application
+FOR EACH ROW EXECUTE FUNCTION maintain_status_counts();
+
+DROP TRIGGER IF EXISTS application_status_counts_upd ON application;
+CREATE TRIGGER application_status_counts_upd
+AFTER UPDATE OF status ON application
+FOR EACH ROW WHEN (LOWER(OLD.status) IS DISTINCT FROM LOWER(NEW.status))
+EXECUTE FUNCTION maintain_status_counts();
+
+DROP TRIGGER IF EXISTS renew_status_counts_ins_del ON renew;
+CREATE TRIGGER renew_status_counts_ins_del
+AFTER INSERT OR DELETE ON renew
+FOR EACH ROW EXECUTE FUNCTION maintain_status_counts();
+
+DROP TRIGGER IF EXISTS renew_status_counts_upd ON renew;
+CREATE TRIGGER renew_status_counts_upd
+AFTER UPDATE OF status ON renew
+FOR EACH ROW WHEN (LOWER(OLD.status) IS DISTINCT FROM LOWER(NEW.status))
+EXECUTE FUNCTION maintain_status_counts();
+
+-- TRUNCATE skips row triggers, so reset the counters explicitly
+CREATE OR REPLACE FUNCTION reset_status_counts() RETURNS TRIGGER AS $$
+BEGIN
+    DELETE FROM status_counts WHERE table_name = TG_TABLE_NAME;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS application_status_counts_truncate ON application;
+CREATE TRIGGER application_status_counts_truncate
+AFTER TRUNCATE ON application
+FOR EACH STATEMENT EXECUTE FUNCTION reset_status_counts();
+
+DROP TRIGGER IF EXISTS renew_status_counts_truncate ON renew;
+CREATE TRIGGER renew_status_counts_truncate
+AFTER TRUNCATE ON renew
+FOR EACH STATEMENT EXECUTE FUNCTION reset_status_counts();
+
+-- Backfill from the existing rows
+BEGIN;
+LOCK TABLE application, renew IN SHARE MODE;
+DELETE FROM status_counts;
+INSERT INTO status_counts (table_name, status, count)
+SELECT 'application', LOWER(COALESCE(status, '')), COUNT(*) FROM application GROUP BY LOWER(COALESCE(status, ''));
+INSERT INTO status_counts (table_name, status, count)
+SELECT 'renew', LOWER(COALESCE(status, '')), COUNT(*) FROM renew GROUP BY LOWER(COALESCE(status, ''));
+COMMIT;
+
+INSERT INTO schema_migrations (version) VALUES ('20261018_add_status_counts')
+ON CONFLICT (version) DO NOTHING;
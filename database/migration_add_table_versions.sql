@@ -0,0 +1,35 @@
+-- Migration to keep a change counter per table for ETag / conditional GET support
+-- Every write statement (from the API or straight from Supabase) bumps the counter once.
+
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR(100) PRIMARY KEY,
+    applied_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name VARCHAR(20) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO table_versions (table_name) VALUES ('application'), ('renew')
+ON CONFLICT (table_name) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = TG_TABLE_NAME;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS application_bump_version ON application;
+CREATE TRIGGER application_bump_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON application
+FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+DROP TRIGGER IF EXISTS renew_bump_version ON renew;
+CREATE TRIGGER renew_bump_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON renew
+FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+INSERT INTO schema_migrations (version) VALUES ('20261018_add_table_versions')
+ON CONFLICT (version) DO NOTHING;
@@ -0,0 +1,31 @@
+-- Migration to make user emails unique regardless of case
+-- The applicant import matches existing users on LOWER(email) and inserts
+-- with ON CONFLICT on this index, so 'Ana@x.com' is not created again as
+-- 'ana@x.com'. Creating the index fails while two users' emails differ only
+-- by case; the check below lists them so they can be merged first.
+
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR(100) PRIMARY KEY,
+    applied_at TIMESTAMP DEFAULT NOW()
+);
+
+BEGIN;
+
+DO $$
+DECLARE
+    duplicates TEXT;
+BEGIN
+    SELECT string_agg(lowered, ', ') INTO duplicates
+    FROM (SELECT LOWER(email) AS lowered FROM users GROUP BY 1 HAVING COUNT(*) > 1) d;
+    IF duplicates IS NOT NULL THEN
+        RAISE EXCEPTION 'users emails differ only by case: %', duplicates;
+    END IF;
+END $$;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_email_lower
+    ON users (LOWER(email));
+
+INSERT INTO schema_migrations (version) VALUES ('20261018_add_users_email_lower_index')
+ON CONFLICT (version) DO NOTHING;
+
+COMMIT;
@@ -0,0 +1,19 @@
+-- Migration to make submission_date NOT NULL on application and renew
+-- The list endpoints page by (submission_date, id) keysets, which a NULL date
+-- breaks: NULLs sort first under DESC, a cursor cannot encode them, and row
+-- comparisons never match them. Rows without a date are backfilled with the
+-- epoch so they keep sorting last.
+
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR(100) PRIMARY KEY,
+    applied_at TIMESTAMP DEFAULT NOW()
+);
+
+UPDATE application SET submission_date = TIMESTAMP 'epoch' WHERE submission_date IS NULL;
+ALTER TABLE application ALTER COLUMN submission_date SET NOT NULL;
+
+UPDATE renew SET submission_date = TIMESTAMP 'epoch' WHERE submission_date IS NULL;
+ALTER TABLE renew ALTER COLUMN submission_date SET NOT NULL;
+
+INSERT INTO schema_migrations (version) VALUES ('20261018_require_submission_date')
+ON CONFLICT (version) DO NOTHING;